@@ -0,0 +1,187 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Streams a canned response as server-sent events, the way the real API does,
+with configurable pacing. `--connect-delay` is charged once per new TCP
+connection to stand in for the DNS + TCP + TLS setup a real API costs, so
+connection reuse shows up in the numbers.
+
+$ python benchmarks/mock_openai.py --port 8765 --chunks 200
+$ OPENAI_API_BASE=http://127.0.0.1:8765/v1 gpyt
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+from aiohttp import web
+
+WORDS = "The quick brown fox jumps over the lazy dog. ".split(" ")
+
+
+@dataclass
+class MockSettings:
+    chunks: int = 100  # streamed deltas per response
+    chunk_size: int = 1  # words per delta
+    paragraph: int = 0  # deltas per paragraph, 0 streams one long paragraph
+    chunk_delay: float = 0.0  # seconds between deltas
+    first_token_delay: float = 0.0  # seconds before the first delta
+    connect_delay: float = 0.0  # seconds charged to every new connection
+    fail_requests: int = 0  # answer this many requests with `fail_status` first
+    fail_status: int = 429
+
+
+def _chunk(content: str | None, finish: str | None = None) -> bytes:
+    delta = {} if content is None else {"content": content}
+    data = {
+        "id": "chatcmpl-mock",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "mock",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+def make_app(settings: MockSettings) -> web.Application:
+    seen: weakref.WeakSet = weakref.WeakSet()
+    stats = {"connections": 0, "requests": 0, "deltas": 0, "disconnects": 0}
+
+    @web.middleware
+    async def handshake(request: web.Request, handler):
+        transport = request.transport
+        if transport is not None and transport not in seen:
+            seen.add(transport)
+            stats["connections"] += 1
+            await asyncio.sleep(settings.connect_delay)
+        return await handler(request)
+
+    async def models(_: web.Request) -> web.Response:
+        return web.json_response({"error": {"message": "no key"}}, status=401)
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        stats["requests"] += 1
+        body = await request.json()
+        if stats["requests"] <= settings.fail_requests:
+            error = {"message": "mock failure", "type": "mock", "code": None}
+            return web.json_response({"error": error}, status=settings.fail_status)
+        words = [
+            "".join(
+                WORDS[j % len(WORDS)] + " "
+                for j in range(i * settings.chunk_size, (i + 1) * settings.chunk_size)
+            )
+            for i in range(settings.chunks)
+        ]
+        if settings.paragraph:
+            for i in range(settings.paragraph - 1, len(words), settings.paragraph):
+                words[i] += "\n\n"
+        await asyncio.sleep(settings.first_token_delay)
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": "".join(words)}
+            return web.json_response(
+                {
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "model": body.get("model", "mock"),
+                    "choices": [{"index": 0, "message": message}],
+                    "usage": {},
+                }
+            )
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        for word in words:
+            try:
+                await response.write(_chunk(word))
+            except ConnectionResetError:  # the client hung up
+                stats["disconnects"] += 1
+                return response
+            stats["deltas"] += 1
+            if settings.chunk_delay:
+                await asyncio.sleep(settings.chunk_delay)
+        await response.write(_chunk(None, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    app = web.Application(middlewares=[handshake])
+    app["stats"] = stats
+    app.router.add_get("/v1/models", models)
+    app.router.add_post("/v1/chat/completions", completions)
+    return app
+
+
+class MockServer:
+    """Runs the mock API on a background thread, for in-process benchmarks"""
+
+    def __init__(self, settings: MockSettings | None = None, port: int = 0):
+        self.settings = settings or MockSettings()
+        self.port = port
+        self.app = make_app(self.settings)
+        self._loop = asyncio.new_event_loop()
+        self._runner = web.AppRunner(self.app)
+        self._started = threading.Event()
+
+    @property
+    def api_base(self) -> str:
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    @property
+    def stats(self) -> dict:
+        return self.app["stats"]
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, "127.0.0.1", self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        self._started.set()
+        self._loop.run_forever()
+
+    def __enter__(self) -> "MockServer":
+        threading.Thread(target=self._serve, daemon=True).start()
+        self._started.wait()
+        return self
+
+    def __exit__(self, *_) -> None:
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chunks", type=int, default=MockSettings.chunks)
+    parser.add_argument("--chunk-size", type=int, default=1, help="words")
+    parser.add_argument("--paragraph", type=int, default=0, help="deltas")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds")
+    parser.add_argument("--first-token-delay", type=float, default=0.0)
+    parser.add_argument("--connect-delay", type=float, default=0.0)
+    parser.add_argument("--fail-requests", type=int, default=0)
+    parser.add_argument("--fail-status", type=int, default=429)
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        chunks=args.chunks,
+        chunk_size=args.chunk_size,
+        paragraph=args.paragraph,
+        chunk_delay=args.chunk_delay,
+        first_token_delay=args.first_token_delay,
+        connect_delay=args.connect_delay,
+        fail_requests=args.fail_requests,
+        fail_status=args.fail_status,
+    )
+    web.run_app(make_app(settings), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Cold startup benchmark.
+
+Compares building only the selected backend (what `gpyt` does now) against
+building every backend up front (what `gpyt` used to do at import time).
+Each sample is a fresh interpreter so nothing is warm in `sys.modules`.
+
+$ python benchmarks/startup.py --backend gpt --runs 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LAZY = "import gpyt; gpyt.backends.get({backend!r})"
+EAGER = "import gpyt; [gpyt.backends.get(name) for name in gpyt.backends.names()]"
+
+
+def _sample(code: str) -> float:
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY") or "sk-bench"}
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        last_line = result.stderr.decode().strip().splitlines()[-1:]
+        raise RuntimeError(last_line[0] if last_line else "unknown error")
+
+    return elapsed * 1000
+
+
+def measure(code: str, runs: int) -> dict:
+    try:
+        samples = [_sample(code) for _ in range(runs)]
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+    return {
+        "median_ms": statistics.median(samples),
+        "min_ms": min(samples),
+        "max_ms": max(samples),
+        "runs": runs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", default="gpt")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    results = {
+        "lazy": measure(LAZY.format(backend=args.backend), args.runs),
+        "eager": measure(EAGER, args.runs),
+    }
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    for mode, result in results.items():
+        if "error" in result:
+            print(f"{mode:>6}: failed ({result['error']})")
+            continue
+        print(
+            f"{mode:>6}: {result['median_ms']:8.1f} ms median "
+            f"({result['min_ms']:.1f} - {result['max_ms']:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
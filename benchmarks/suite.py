@@ -0,0 +1,267 @@
+"""
+End-to-end benchmark suite, run against the local mock API.
+
+Measures cold startup, time to first token, chunks per second through
+`AssistantResponses.add_response`, save latency, sidebar load time for N
+synthetic conversations and the time to reopen long conversations, and
+writes every number to one JSON document so runs can be compared over time.
+
+$ python benchmarks/suite.py --output results.json
+$ python benchmarks/suite.py --only ttft,render --conversations 5000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from mock_openai import MockServer, MockSettings  # noqa: E402
+import startup  # noqa: E402
+import ttft  # noqa: E402
+
+
+def _app(cache_dir: str):
+    """A fresh TUI whose conversations live in `cache_dir`"""
+    import gpyt
+    from gpyt.app import gpyt as App
+
+    os.environ["GPT_CACHE_DIR"] = cache_dir
+    return App(backends=gpyt.backends)
+
+
+def _conversation(turns: int, words: int = 60):
+    from gpyt.conversation import Conversation, Message
+    from gpyt.id import get_id
+
+    text = " ".join(ttft.QUESTION.split() * (words // 8 + 1))
+    log = []
+    for turn in range(turns):
+        log.append(Message(id=get_id(), role="user", content=f"{turn}: {text}"))
+        log.append(Message(id=get_id(), role="assistant", content=text))
+    return Conversation(id=get_id(), summary=f"Synthetic {turns} turns", log=log)
+
+
+def bench_startup(args) -> dict:
+    return {
+        "lazy": startup.measure(startup.LAZY.format(backend="gpt"), args.runs),
+        "eager": startup.measure(startup.EAGER, args.runs),
+    }
+
+
+def bench_ttft(args) -> dict:
+    results = {}
+    for mode, run in {
+        "sdk_default": lambda base: ttft.sdk_default(base, args.model, args.runs),
+        "pooled_warm": lambda base: ttft.pooled(base, args.model, args.runs, True),
+    }.items():
+        settings = MockSettings(connect_delay=args.connect_delay)
+        with MockServer(settings) as server:
+            samples = asyncio.run(run(server.api_base))
+            results[mode] = ttft.summarize(samples, server.stats["connections"])
+
+    return results
+
+
+def bench_render(args) -> dict:
+    """Stream a long response into the TUI and time it end to end"""
+    settings = MockSettings(
+        chunks=args.chunks, chunk_size=args.chunk_size, paragraph=args.paragraph
+    )
+
+    async def run(api_base: str) -> dict:
+        import gpyt
+        from gpyt.assistant import Assistant
+        from gpyt.backends import GPT
+        from gpyt.config import PROMPT
+
+        gpyt.backends.register(
+            GPT,
+            lambda registry: Assistant(
+                api_key=ttft.API_KEY,
+                model=args.model,
+                prompt=PROMPT,
+                api_base=api_base,
+            ),
+        )
+        with tempfile.TemporaryDirectory() as cache_dir:
+            app = _app(cache_dir)
+            async with app.run_test() as pilot:
+                await pilot.pause()
+                start = time.perf_counter()
+                await app.fetch_assistant_response(ttft.QUESTION).wait()
+                elapsed = time.perf_counter() - start
+                await app._get_assistant().aclose()
+
+        return {
+            "chunks": args.chunks,
+            "chunk_size": args.chunk_size,
+            "seconds": elapsed,
+            "chunks_per_second": args.chunks / elapsed,
+        }
+
+    with MockServer(settings) as server:
+        return asyncio.run(run(server.api_base))
+
+
+def bench_save(args) -> dict:
+    """Append one turn at a time to a growing conversation"""
+    from gpyt.conversation import Message
+    from gpyt.id import get_id
+    from gpyt.store import ConversationStore
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = ConversationStore(Path(cache_dir))
+        conversation = _conversation(0)
+        samples = []
+        for turn in range(args.turns):
+            conversation.log.append(Message(id=get_id(), role="user", content="q"))
+            conversation.log.append(
+                Message(id=get_id(), role="assistant", content=ttft.QUESTION * 20)
+            )
+            start = time.perf_counter()
+            store.save(conversation)
+            samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "turns": args.turns,
+        "first_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "last_ms": samples[-1],
+        "max_ms": max(samples),
+    }
+
+
+def bench_sidebar(args) -> dict:
+    """Open the Past Conversations sidebar over N saved conversations"""
+    from gpyt.store import ConversationStore
+
+    async def open_sidebar(cache_dir: str) -> float:
+        app = _app(cache_dir)
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            start = time.perf_counter()
+            app.action_toggle_sidebar()
+            await pilot.pause()
+            elapsed = (time.perf_counter() - start) * 1000
+            await app._get_assistant().aclose()
+            return elapsed
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        store = ConversationStore(Path(cache_dir, ".cache", "gpyt", "conversations"))
+        start = time.perf_counter()
+        for i in range(args.conversations):
+            store.save(_conversation(1 + i % 5))
+        generated = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.recent_paths(50)
+        recent = (time.perf_counter() - start) * 1000
+
+        return {
+            "conversations": args.conversations,
+            "generate_seconds": generated,
+            "recent_50_ms": recent,  # directory listings only
+            "first_open_ms": asyncio.run(open_sidebar(cache_dir)),  # no manifest
+            "open_ms": asyncio.run(open_sidebar(cache_dir)),
+        }
+
+
+def bench_reopen(args) -> dict:
+    """Time to first paint after selecting a saved conversation of N turns"""
+
+    async def reopen(cache_dir: str, turns: int) -> float:
+        app = _app(cache_dir)
+        conversation = _conversation(turns)
+        async with app.run_test() as pilot:
+            await pilot.pause()
+            start = time.perf_counter()
+            app.on_select_previous_conversation(conversation)
+            await pilot.pause()
+            elapsed = (time.perf_counter() - start) * 1000
+            await app._get_assistant().aclose()
+            return elapsed
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for turns in args.reopen_turns:
+            results[f"{turns}_turns_ms"] = asyncio.run(reopen(cache_dir, turns))
+
+    return results
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "ttft": bench_ttft,
+    "render": bench_render,
+    "save": bench_save,
+    "sidebar": bench_sidebar,
+    "reopen": bench_reopen,
+}
+
+
+def _meta() -> dict:
+    commit = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True
+    )
+    return {
+        "commit": commit.stdout.decode().strip() or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", help="comma separated subset of benchmarks")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--connect-delay", type=float, default=0.1)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=1, help="words")
+    parser.add_argument("--paragraph", type=int, default=40, help="chunks")
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument(
+        "--reopen-turns",
+        type=lambda value: [int(turns) for turns in value.split(",")],
+        default=[10, 100, 300],
+        help="comma separated conversation lengths",
+    )
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    assert not unknown, f"Unknown benchmarks {sorted(unknown)}"
+
+    sys.argv = sys.argv[:1]  # gpyt parses the command line on import
+    os.environ.setdefault("OPENAI_API_KEY", ttft.API_KEY)
+
+    results = {}
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        try:
+            results[name] = BENCHMARKS[name](args)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+
+    report = json.dumps({"meta": _meta(), "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Time-to-first-token benchmark against the local mock API.
+
+Compares the SDK's default connection handling (a new HTTP session, and so a
+new connection, for every streamed request) with the assistant's pooled
+keep-alive session, cold and pre-warmed the way the app does on mount.
+
+$ python benchmarks/ttft.py --runs 20 --connect-delay 0.15 --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mock_openai import MockServer, MockSettings  # noqa: E402
+
+API_KEY = "sk-bench"
+QUESTION = "How do I write a for loop in bash?"
+
+
+async def _first_token(stream) -> float:
+    start = time.perf_counter()
+    first = None
+    async for _ in stream:
+        if first is None:
+            first = time.perf_counter() - start
+    assert first is not None, "empty response"
+    return first * 1000
+
+
+async def sdk_default(api_base: str, model: str, runs: int) -> list[float]:
+    import openai
+
+    async def stream():
+        response = await openai.ChatCompletion.acreate(  # type: ignore
+            model=model,
+            messages=[{"role": "user", "content": QUESTION}],
+            stream=True,
+            api_key=API_KEY,
+            api_base=api_base,
+        )
+        async for chunk in response:  # type: ignore
+            if chunk["choices"][0]["delta"].get("content"):
+                yield chunk
+
+    return [await _first_token(stream()) for _ in range(runs)]
+
+
+async def pooled(api_base: str, model: str, runs: int, warm: bool) -> list[float]:
+    from gpyt.assistant import Assistant
+    from gpyt.config import PROMPT
+
+    assistant = Assistant(
+        api_key=API_KEY, model=model, prompt=PROMPT, memory=False, api_base=api_base
+    )
+    if warm:
+        await assistant.warm_up()
+    try:
+        return [await _first_token(assistant.astream(QUESTION)) for _ in range(runs)]
+    finally:
+        await assistant.http.aclose()
+
+
+def summarize(samples: list[float], connections: int) -> dict:
+    ordered = sorted(samples)
+    return {
+        "first_ms": samples[0],
+        "median_ms": statistics.median(samples),
+        "p90_ms": ordered[int(0.9 * (len(ordered) - 1))],
+        "runs": len(samples),
+        "connections": connections,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument(
+        "--connect-delay",
+        type=float,
+        default=0.1,
+        help="seconds the mock charges per new connection (stands in for TLS)",
+    )
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    sys.argv = sys.argv[:1]  # gpyt parses the command line on import
+    os.environ.setdefault("OPENAI_API_KEY", API_KEY)
+
+    modes = {
+        "sdk_default": lambda base: sdk_default(base, args.model, args.runs),
+        "pooled_cold": lambda base: pooled(base, args.model, args.runs, warm=False),
+        "pooled_warm": lambda base: pooled(base, args.model, args.runs, warm=True),
+    }
+    results = {}
+    for mode, run in modes.items():
+        # a server per mode, so no mode inherits another's open connections
+        with MockServer(MockSettings(connect_delay=args.connect_delay)) as server:
+            samples = asyncio.run(run(server.api_base))
+            results[mode] = summarize(samples, server.stats["connections"])
+
+    if args.json:
+        print(json.dumps(results))
+        return
+
+    for mode, result in results.items():
+        print(
+            f"{mode:>12}: first {result['first_ms']:7.1f} ms, "
+            f"median {result['median_ms']:7.1f} ms, p90 {result['p90_ms']:7.1f} ms "
+            f"({result['connections']} connections / {result['runs']} requests)"
+        )
+
+
+if __name__ == "__main__":
+    main()
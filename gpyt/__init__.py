@@ -2,13 +2,16 @@ import os
 
 from dotenv import dotenv_values
 
-from gpyt.free_assistant import FreeAssistant
-from gpyt.palm_assistant import PalmAssistant
-
-from .app import gpyt
-from .args import USE_EXPERIMENTAL_FREE_MODEL
-from .assistant import Assistant
+from .args import (
+    CACHE_RESPONSES,
+    CACHE_STATS,
+    SEARCH_QUERY,
+    USE_EXPERIMENTAL_FREE_MODEL,
+)
+from .backends import BackendRegistry
+from .cache import ResponseCache
 from .config import MODEL, PROMPT
+from .store import get_saved_conversations_path
 
 # check for environment variable first
 API_KEY = os.getenv("OPENAI_API_KEY")
@@ -22,8 +25,11 @@ if API_KEY is None or (isinstance(API_KEY, str) and not len(API_KEY)):
 
 
 assert (
-    API_KEY is not None and len(API_KEY)
-) or USE_EXPERIMENTAL_FREE_MODEL, """
+    (API_KEY is not None and len(API_KEY))
+    or USE_EXPERIMENTAL_FREE_MODEL
+    or SEARCH_QUERY is not None
+    or CACHE_STATS
+), """
 
 ❗Missing OpenAI API Key ❗
 
@@ -48,8 +54,23 @@ generate your own OpenAI API key (see above)
 """
 
 
-gpt = Assistant(api_key=API_KEY or "", model=MODEL, prompt=PROMPT)
-gpt4 = Assistant(api_key=API_KEY or "", model="gpt-4", prompt=PROMPT)
-free_gpt = FreeAssistant()
-palm = PalmAssistant(api_key=PALM_API_KEY)
-app = gpyt(assistant=gpt, free_assistant=free_gpt, palm=palm, gpt4=gpt4)
+# backends are built on first use, see `BackendRegistry`
+response_cache = (
+    ResponseCache(get_saved_conversations_path().parent) if CACHE_RESPONSES else None
+)
+backends = BackendRegistry(
+    api_key=API_KEY, palm_api_key=PALM_API_KEY, response_cache=response_cache
+)
+
+
+def __getattr__(name: str):
+    # the TUI is only imported (and built) once something asks for it, so the
+    # headless modes never pay for Textual
+    if name == "app":
+        global app
+        from .app import gpyt
+
+        app = gpyt(backends=backends)
+        return app
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
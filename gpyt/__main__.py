@@ -1,7 +1,54 @@
-from gpyt import app
+import sys
+
+from . import cli
+from .args import (
+    BATCH_CONCURRENCY,
+    BATCH_INPUT,
+    BATCH_OUTPUT,
+    CACHE_STATS,
+    PROMPT,
+    SAVE_CONVERSATION,
+    SEARCH_QUERY,
+    USE_EXPERIMENTAL_FREE_MODEL,
+    USE_GPT4,
+    USE_PALM_MODEL,
+)
 
 
 def main():
+    if SEARCH_QUERY is not None:
+        cli.search(SEARCH_QUERY)
+        return
+
+    if BATCH_INPUT is not None or PROMPT is not None or cli.stdin_is_piped():
+        from gpyt import backends, response_cache
+
+        from .backends import choose
+
+        name = choose(
+            free=USE_EXPERIMENTAL_FREE_MODEL, palm=USE_PALM_MODEL, gpt4=USE_GPT4
+        )
+        if BATCH_INPUT is not None:
+            status = cli.batch(
+                lambda: backends.build(name),
+                BATCH_INPUT,
+                BATCH_OUTPUT,
+                BATCH_CONCURRENCY,
+            )
+        else:
+            prompt = cli.read_prompt(PROMPT)
+            status = cli.ask(backends.get(name), prompt, save=SAVE_CONVERSATION)
+
+        if CACHE_STATS:
+            cli.cache_stats(response_cache)
+        sys.exit(status)
+
+    if CACHE_STATS:
+        cli.cache_stats()
+        return
+
+    from gpyt import app
+
     try:
         app.run()
 
@@ -9,4 +56,5 @@ def main():
         print("\n🔧 KeyboardInterrupt detected, cleaning up and quitting.")
 
 
-main()
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,18 @@
 import argparse
 
+from .config import BATCH_CONCURRENCY, CONTEXT_POLICY, HEDGE_AFTER, SUMMARIZER
+from .context import POLICIES
+from .metrics import EXPORTERS
+from .summarizer import SUMMARIZERS
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
 parser = argparse.ArgumentParser()
 parser.add_argument(
     "--free", help="Use the gpt4free model. (experimental)", action="store_true"
@@ -14,9 +27,134 @@ parser.add_argument(
     action="store_true",
 )
 
+parser.add_argument(
+    "--auto",
+    help="Pick the model per request: the cheapest one the prompt fits, "
+    "unless it has been slow lately or a routing rule says otherwise.",
+    action="store_true",
+)
+
+parser.add_argument(
+    "--route-rules",
+    help="JSON list of routing rules for --auto, replacing the ones in config.py "
+    '(e.g. [{"backend": "gpt4", "keywords": ["proof"]}]).',
+    metavar="FILE",
+)
+
+parser.add_argument(
+    "--context",
+    help="How history is trimmed to fit the model's context window.",
+    choices=POLICIES,
+    default=CONTEXT_POLICY,
+)
+
+parser.add_argument(
+    "--summarizer",
+    help="How new conversations are titled: locally, or by asking the model.",
+    choices=SUMMARIZERS,
+    default=SUMMARIZER,
+)
+
+parser.add_argument(
+    "--cache",
+    help="Answer repeated requests from an on-disk cache of past responses.",
+    action="store_true",
+)
+
+parser.add_argument(
+    "--cache-stats",
+    help="Print the response cache's hits, misses and size on stderr once a "
+    "headless (-p) or --batch run ends, or on its own, what it holds.",
+    action="store_true",
+)
+
+parser.add_argument(
+    "--hedge",
+    help="If the selected model hasn't started answering after --hedge-after "
+    "seconds, ask BACKEND (gpt, gpt4, free or palm) too and keep whichever "
+    "answers first.",
+    metavar="BACKEND",
+)
+
+parser.add_argument(
+    "--hedge-after",
+    help="Seconds to wait for a first token before --hedge races its backend.",
+    type=float,
+    default=HEDGE_AFTER,
+)
+
+parser.add_argument(
+    "--metrics",
+    help="Record per-response timings (time to first token, tokens/s, render, "
+    "save and summary time) to a rotating JSONL file or a Prometheus text file.",
+    choices=EXPORTERS,
+)
+
+parser.add_argument(
+    "--profile",
+    help="Run every response under cProfile and dump the stats next to the "
+    "conversations, one .prof file per response.",
+    action="store_true",
+)
+
+parser.add_argument(
+    "-p",
+    "--prompt",
+    help="Stream the answer to PROMPT to stdout instead of starting the TUI. "
+    "Piped stdin is appended to the prompt (or is the prompt, without -p).",
+    metavar="PROMPT",
+)
+
+parser.add_argument(
+    "--save",
+    help="Save headless (-p) conversations along with the TUI's.",
+    action="store_true",
+)
+
+parser.add_argument(
+    "--batch",
+    help="Run every prompt of the JSONL file INPUT and write the results to "
+    "--output as they complete. Rerunning resumes an interrupted batch.",
+    metavar="INPUT",
+)
+
+parser.add_argument(
+    "--output",
+    help="Where --batch writes its results (default: INPUT.out.jsonl).",
+)
+
+parser.add_argument(
+    "--concurrency",
+    help="Requests --batch keeps in flight at once.",
+    type=positive_int,
+    default=BATCH_CONCURRENCY,
+)
+
+parser.add_argument(
+    "--search",
+    help="Search all saved conversations for QUERY and print the best hits.",
+    metavar="QUERY",
+)
+
 
 args = parser.parse_args()
 
 USE_EXPERIMENTAL_FREE_MODEL = args.free
 USE_PALM_MODEL = args.palm
 USE_GPT4 = args.gpt4
+USE_AUTO_ROUTING = args.auto
+ROUTE_RULES_PATH = args.route_rules
+CONTEXT = args.context
+SUMMARIZER_NAME = args.summarizer
+CACHE_RESPONSES = args.cache
+CACHE_STATS = args.cache_stats
+HEDGE_BACKEND = args.hedge
+HEDGE_AFTER = args.hedge_after
+METRICS_EXPORT = args.metrics
+PROFILE = args.profile
+SEARCH_QUERY = args.search
+PROMPT = args.prompt
+SAVE_CONVERSATION = args.save
+BATCH_INPUT = args.batch
+BATCH_OUTPUT = args.output
+BATCH_CONCURRENCY = args.concurrency
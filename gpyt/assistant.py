@@ -1,16 +1,30 @@
-from typing import Generator
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Generator
 
 import openai
 
-import tiktoken
-
 from .config import (
     API_ERROR_FALLBACK,
-    SUMMARY_PROMPT,
-    APPROX_PROMPT_TOKEN_USAGE,
-    PRICING_LOOKUP,
+    API_ERROR_MESSAGE,
+    CONTEXT_PIN_SYSTEM_PROMPT,
+    CONTEXT_POLICY,
+    CONTEXT_RESPONSE_RESERVE,
+    HISTORY_SUMMARY_PROMPT,
     MODEL_MAX_CONTEXT,
+    SUMMARY_PROMPT,
 )
+from .context import ContextWindow
+from .cache import replay
+from .conversation import Message
+from .history import ChatView
+from .id import get_id
+from .ledger import Spend, TokenLedger
+from .ratelimit import aretry, get_rate_limiter, retry
+from .session import HTTPSession
+from .tokenizer import get_tokenizer
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
 
 
 class Assistant:
@@ -22,6 +36,8 @@ class Assistant:
 
     kDEFAULT_SUMMARY_FALLTHROUGH = "User Question"
 
+    error_message = API_ERROR_MESSAGE  # shown when a stream fails
+
     def __init__(
         self,
         *,
@@ -29,111 +45,285 @@ class Assistant:
         model: str,
         prompt: str,
         memory: bool = True,
+        context_policy: str = CONTEXT_POLICY,
+        cache: "ResponseCache | None" = None,
+        api_base: str | None = None,
     ):
         self.api_key = api_key
+        self.api_base = api_base or openai.api_base
+        self.http = HTTPSession(self.api_base)
+        self.cache = cache
         self.model = model
+        self.limiter = get_rate_limiter(model)
         self.prompt = prompt
         self.summary_prompt = SUMMARY_PROMPT
         self.memory = memory
-        self.messages = [
-            {"role": "system", "content": self.prompt},
-        ]
+        self._system = {"role": "system", "content": self.prompt}
+        self.log: list[Message] = []  # see `attach`
+        self._recorded = 0  # messages of `log` counted into ledger and context
         self.error_fallback_message = API_ERROR_FALLBACK
-        openai.api_key = self.api_key
-        self._encoding_engine = tiktoken.get_encoding(
-            "cl100k_base"
-        )  # gpt3.5/gpt4 encoding engine
-        self.input_tokens_this_convo = APPROX_PROMPT_TOKEN_USAGE
-        self.output_tokens_this_convo = 10
-        self.price_of_this_convo = self.get_default_price_of_prompt()
-
-    def set_history(self, new_history: list):
-        """Reassign all message history except for system message"""
-        sys_prompt = self.messages[0]
-        self.messages = new_history[::]
-        self.messages.insert(0, sys_prompt)
-
-    def get_tokens_used(self, message: str) -> int:
-        return len(self._encoding_engine.encode(message))
-
-    def get_default_price_of_prompt(self) -> float:
-        return self.get_approximate_price(
-            self.get_tokens_used(self.prompt), 0
-        ) + self.get_approximate_price(self.get_tokens_used(self.summary_prompt), 10)
-
-    def tokens_used_this_convo(self) -> int:
-        num = self.input_tokens_this_convo + self.output_tokens_this_convo
-        has_limit = MODEL_MAX_CONTEXT.get(self.model, None)
-        if not has_limit:
-            return 0
-
-        return num
-
-    def update_token_usage_for_input(self, in_message: str, out_message: str) -> None:
-        in_tokens_used = self.get_tokens_used(in_message)
-        out_tokens_used = self.get_tokens_used(out_message)
-        self.input_tokens_this_convo += self.input_tokens_this_convo + in_tokens_used
-        self.output_tokens_this_convo += self.output_tokens_this_convo + out_tokens_used
-        self.price_of_this_convo += self.get_approximate_price(
-            self.input_tokens_this_convo, self.output_tokens_this_convo
+        self._tokenizer = get_tokenizer()
+        self.ledger = TokenLedger(self.model, self._tokenizer)
+        max_context = MODEL_MAX_CONTEXT.get(self.model, None)
+        self.context = ContextWindow(
+            budget=max_context - CONTEXT_RESPONSE_RESERVE if max_context else None,
+            policy=context_policy,
+            pin_system_prompt=CONTEXT_PIN_SYSTEM_PROMPT,
+            summarize=self.summarize_history,
+            count_tokens=self.get_tokens_used,
         )
+        self._reset_usage()
+
+    def _reset_usage(self) -> None:
+        self.ledger.reset(self.prompt)
+        self.context.reset(self.ledger.context_tokens)
 
-    def get_approximate_price(self, _in: int | float, _out: int | float) -> float:
-        known_pricing = PRICING_LOOKUP.get(self.model, None)
-        if not known_pricing:
-            return 0.0
-        in_price_ratio = PRICING_LOOKUP[self.model][0]
-        out_price_ratio = PRICING_LOOKUP[self.model][1]
+    def _forget_history(self) -> None:
+        """Only the system prompt in context again, the totals billed stay"""
+        self.ledger.forget(self.prompt)
+        self.context.reset(self.ledger.context_tokens)
 
-        limit = MODEL_MAX_CONTEXT.get(self.model, None)
-        if not limit:
-            return 0
+    def _record_message(self, role: str, content: str) -> None:
+        self.context.append(self.ledger.record_message(role, content))
 
-        _in = min(_in, limit / 2)
-        _out = min(_out, limit / 2)
+    def _sync(self) -> None:
+        """Count in whatever was appended to `log` since the last request"""
+        for message in self.log[self._recorded :]:
+            self._record_message(message.role, message.content)
+        self._recorded = len(self.log)
 
-        return (_in / 1000) * in_price_ratio + (_out / 1000) * out_price_ratio
+    @property
+    def messages(self) -> ChatView:
+        """The history in the chat API's format, system prompt first"""
+        return ChatView(self._system, self.log)
+
+    def attach(self, log: list[Message], spend: Spend | None = None) -> None:
+        """
+        Use `log` (a conversation's own list) as the history, without copying
+        it. Messages the owner appends to it are part of the next request.
+        Whatever this backend bills from now on is added to `spend` as well,
+        the conversation's cost across backends.
+        """
+        self.log = log
+        self.ledger.spend = spend
+        self._reset_usage()
+        self._recorded = 0
+        if self.memory:  # without it, the history is never sent
+            self._sync()
+
+    def get_tokens_used(self, message: str) -> int:
+        return self._tokenizer.count(message)
 
     def clear_history(self):
         """
-        Wipe all message history during this conversation, except for the
-        first system message
+        Start over with an empty history (detaching from any attached log),
+        only the system message is kept
         """
-        self.messages = [self.messages[0]]
-        self.input_tokens_this_convo = APPROX_PROMPT_TOKEN_USAGE
-        self.output_tokens_this_convo = 10
-        self.price_of_this_convo = self.get_default_price_of_prompt()
+        self.log = []
+        self._recorded = 0
+        self.ledger.spend = None
+        self._reset_usage()
 
-    def get_response_stream(self, user_input: str) -> Generator:
+    def _log_request(self, user_input: str, logged: bool = False) -> None:
+        """
+        Log `user_input`, unless the owner of an attached log already did
+        (`logged`, the app appends its own messages). Without memory the
+        context starts over at every request (what was billed adds up all the
+        same), the log itself (maybe a conversation's) is left alone.
+        """
+        if not self.memory:
+            self._forget_history()
+            self._record_message("user", user_input)
+            return
+
+        if not logged:
+            self.log.append(Message(id=get_id(), role="user", content=user_input))
+        self._sync()
+
+    def _prepare_request(
+        self, user_input: str, logged: bool = False
+    ) -> list[dict[str, str]]:
+        """Log `user_input` and return the messages to send along with it"""
+        self._log_request(user_input, logged)
+        return self._select(user_input)
+
+    async def _aprepare_request(
+        self, user_input: str, logged: bool = False
+    ) -> list[dict[str, str]]:
+        """
+        `_prepare_request` for the event loop: folding old turns into the
+        history summary is a whole completion, so it runs in a thread
+        """
+        self._log_request(user_input, logged)
+        if self.context.folding:
+            return await asyncio.to_thread(self._select, user_input)
+        return self._select(user_input)
+
+    def _select(self, user_input: str) -> list[dict[str, str]]:
+        if not self.memory:
+            return [self._system, {"role": "user", "content": user_input}]
+        return self.context.select(self.messages)
+
+    def _cached(self, messages: list[dict[str, str]]) -> str | None:
+        if self.cache is None:
+            return None
+        return self.cache.get(self.model, messages)
+
+    def _cache(self, messages: list[dict[str, str]], content: str) -> None:
+        if self.cache is not None:
+            self.cache.put(self.model, messages, content)
+
+    def get_response_stream(
+        self, user_input: str, *, logged: bool = False
+    ) -> Generator:
         """
         Use OpenAI API to retrieve a ChatCompletion response from a GPT model.
 
         Memory can be configured so that the assistant forgets previous messages
         you or it has sent. (saves tokens ($$$) as well)
+
+        `logged` says the owner of the attached log already appended
+        `user_input` to it.
         """
-        if not self.memory:
-            self.clear_history()
-        self.messages.append({"role": "user", "content": user_input})
+        messages = self._prepare_request(user_input, logged)
+        cached = self._cached(messages)
+        self.ledger.replaying = cached is not None
+        if cached is not None:
+            return (
+                {"choices": [{"delta": {"content": delta}}]} for delta in replay(cached)
+            )
+
+        tokens = self.context.tokens
+
+        def request():
+            self.limiter.wait(tokens)  # every attempt spends from the budget
+            return openai.ChatCompletion.create(  # type: ignore
+                model=self.model,
+                messages=messages,
+                stream=True,
+                api_key=self.api_key,
+                api_base=self.api_base,
+            )
+
+        self.ledger.charge(tokens)
+        response = retry(request)
+
+        # print(response["usage"])
+
+        return self._caching_stream(messages, response)  # type: ignore
+
+    def _caching_stream(self, messages: list[dict[str, str]], response) -> Generator:
+        """
+        Pass `response` through, charging its output to the rate limiter
+        however far it got, and caching it once it has fully streamed in
+        """
+        content = []
+        try:
+            for chunk in response:
+                content.append(chunk["choices"][0]["delta"].get("content", None) or "")
+                yield chunk
+        finally:
+            self.limiter.consume(self.get_tokens_used("".join(content)))
+        self._cache(messages, "".join(content))
+
+    async def astream(
+        self, user_input: str, *, logged: bool = False
+    ) -> AsyncIterator[str]:
+        """
+        Same as `get_response_stream` but without blocking the event loop, and
+        yielding the text of each chunk rather than the raw API objects. The
+        output is billed to this backend's ledger as it arrives.
+        """
+        messages = await self._aprepare_request(user_input, logged)
+        cached = self._cached(messages)
+        self.ledger.replaying = cached is not None
+        if cached is not None:
+            for delta in replay(cached):
+                self.ledger.add_output_delta(delta)
+                yield delta
+            return
 
-        response = openai.ChatCompletion.create(  # type: ignore
-            model=self.model,
-            messages=self.messages,
-            stream=True,
+        tokens = self.context.tokens
+
+        async def request():
+            await self.limiter.acquire(tokens)  # every attempt spends from the budget
+            return await openai.ChatCompletion.acreate(  # type: ignore
+                model=self.model,
+                messages=messages,
+                stream=True,
+                api_key=self.api_key,
+                api_base=self.api_base,
+            )
+
+        self.ledger.charge(tokens)
+        with self.http.use() as responses:
+            response = await aretry(request)
+        streamed = []
+        try:
+            async for chunk in response:  # type: ignore
+                content = chunk["choices"][0]["delta"].get("content", None)
+                if content:
+                    streamed.append(content)
+                    self.ledger.add_output_delta(content)
+                    yield content
+        finally:
+            await response.aclose()  # type: ignore
+            self.http.release(responses)  # or a cancelled stream keeps going
+            self.limiter.consume(self.get_tokens_used("".join(streamed)))
+
+        self._cache(messages, "".join(streamed))  # only reached if it completed
+
+    async def warm_up(self) -> None:
+        """Open connections to the API ahead of the first request"""
+        await asyncio.gather(
+            self.http.warm_up(), asyncio.to_thread(self.http.warm_up_sync)
         )
 
-        # print(response["usage"])
+    async def aclose(self) -> None:
+        """Close the connections `warm_up` and `astream` keep open"""
+        await self.http.aclose()
+
+    def _complete(self, system_prompt: str, user_input: str) -> str:
+        """Single non-streaming request, billed to this conversation"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_input},
+        ]
+        cached = self._cached(messages)
+        if cached is not None:
+            return cached
+
+        input_tokens = self.get_tokens_used(system_prompt) + self.get_tokens_used(
+            user_input
+        )
 
-        return response  # type: ignore
+        def request():
+            self.limiter.wait(input_tokens)  # every attempt spends from the budget
+            return openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                api_key=self.api_key,
+                api_base=self.api_base,
+            )
+
+        response = retry(request)
+        content = response["choices"][0]["message"]["content"]  # type: ignore
+        output_tokens = self.get_tokens_used(content)
+        self.limiter.consume(output_tokens)
+        self.ledger.charge(input_tokens, output_tokens)
+        self._cache(messages, content)
+
+        return content
 
     def get_response(self, user_input: str) -> str:
         """Get an entire string back from the assistant"""
-        messages = [
-            {"role": "system", "content": self.summary_prompt},
-            {"role": "user", "content": user_input.rstrip()},
-        ]
-        response = openai.ChatCompletion.create(model=self.model, messages=messages)
+        return self._complete(self.summary_prompt, user_input.rstrip())
 
-        return response["choices"][0]["message"]["content"]  # type: ignore
+    def summarize_history(self, summary: str, transcript: str) -> str:
+        """Fold `transcript` into the running `summary` of older turns"""
+        if summary:
+            transcript = f"Previous summary: {summary}\n\n{transcript}"
+        return self._complete(HISTORY_SUMMARY_PROMPT, transcript)
 
     def get_conversation_summary(self, initial_message: str) -> str:
         """Generate a short 6 word or less summary of the user\'s first message"""
@@ -144,11 +334,23 @@ class Assistant:
 
         return summary
 
-    def log_assistant_response(self, final_response: str) -> None:
+    def log_assistant_response(
+        self, final_response: str, *, logged: bool = False
+    ) -> None:
+        """
+        Count the finished response into the history, appending it to the log
+        unless its owner already did (`logged`)
+        """
         if not self.memory:
             return
 
-        self.messages.append({"role": "assistant", "content": final_response})
+        tokens = self.ledger.finish_output(final_response)
+        if not logged:
+            self.log.append(
+                Message(id=get_id(), role="assistant", content=final_response)
+            )
+        self.context.append(tokens)  # counted as it streamed in
+        self._recorded += 1
 
 
 def _test() -> None:
@@ -0,0 +1,131 @@
+from threading import Lock
+from typing import TYPE_CHECKING, Callable
+
+from .args import CONTEXT
+from .config import MODEL, PROMPT
+
+if TYPE_CHECKING:
+    from .assistant import Assistant
+    from .cache import ResponseCache
+
+
+GPT = "gpt"
+GPT4 = "gpt4"
+FREE = "free"
+PALM = "palm"
+
+
+def choose(*, free: bool = False, palm: bool = False, gpt4: bool = False) -> str:
+    """Name of the backend the given model flags select"""
+    if palm:
+        return PALM
+    if free:
+        return FREE
+    if gpt4:
+        return GPT4
+
+    return GPT
+
+
+class BackendRegistry:
+    """
+    Lazily builds assistant backends.
+
+    Nothing is imported or constructed until a backend is first asked for, so
+    a session only pays the SDK import and setup cost of the backends it
+    actually uses.
+    """
+
+    def __init__(
+        self,
+        *,
+        api_key: str | None,
+        palm_api_key: str | None,
+        response_cache: "ResponseCache | None" = None,
+    ):
+        self.api_key = api_key
+        self.palm_api_key = palm_api_key
+        self.response_cache = response_cache
+        self._factories: dict[str, Callable[["BackendRegistry"], "Assistant"]] = {
+            GPT: _build_gpt,
+            GPT4: _build_gpt4,
+            FREE: _build_free,
+            PALM: _build_palm,
+        }
+        self._built: dict[str, "Assistant"] = {}
+        self._lock = Lock()
+
+    def register(
+        self, name: str, factory: Callable[["BackendRegistry"], "Assistant"]
+    ) -> None:
+        """Add (or replace) the factory used to build backend `name`"""
+        with self._lock:
+            self._factories[name] = factory
+            self._built.pop(name, None)
+
+    def names(self) -> list[str]:
+        return list(self._factories)
+
+    def is_built(self, name: str) -> bool:
+        return name in self._built
+
+    def built(self) -> list["Assistant"]:
+        """Every backend `get` has built so far"""
+        with self._lock:
+            return list(self._built.values())
+
+    def build(self, name: str) -> "Assistant":
+        """A new, unshared instance of backend `name` (for parallel use)"""
+        factory = self._factories.get(name, None)
+        assert factory, f"Unknown backend {name!r}"
+        return factory(self)
+
+    def get(self, name: str) -> "Assistant":
+        """Return backend `name`, building it on first use"""
+        assistant = self._built.get(name, None)
+        if assistant is not None:
+            return assistant
+
+        with self._lock:  # workers may race the UI thread for the first build
+            if name not in self._built:
+                factory = self._factories.get(name, None)
+                assert factory, f"Unknown backend {name!r}"
+                self._built[name] = factory(self)
+
+            return self._built[name]
+
+
+def _build_gpt(registry: BackendRegistry) -> "Assistant":
+    from .assistant import Assistant
+
+    return Assistant(
+        api_key=registry.api_key or "",
+        model=MODEL,
+        prompt=PROMPT,
+        context_policy=CONTEXT,
+        cache=registry.response_cache,
+    )
+
+
+def _build_gpt4(registry: BackendRegistry) -> "Assistant":
+    from .assistant import Assistant
+
+    return Assistant(
+        api_key=registry.api_key or "",
+        model="gpt-4",
+        prompt=PROMPT,
+        context_policy=CONTEXT,
+        cache=registry.response_cache,
+    )
+
+
+def _build_free(_: BackendRegistry) -> "Assistant":
+    from .free_assistant import FreeAssistant
+
+    return FreeAssistant()
+
+
+def _build_palm(registry: BackendRegistry) -> "Assistant":
+    from .palm_assistant import PalmAssistant
+
+    return PalmAssistant(api_key=registry.palm_api_key)
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .assistant import Assistant
+
+
+def read_jsonl(path: Path) -> list[dict]:
+    """Every complete record of `path`, a line torn by an interruption is skipped"""
+    if not path.exists():
+        return []
+
+    records = []
+    with open(path, "r") as fd:
+        for line in fd:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+    return records
+
+
+def load_prompts(path: Path) -> list[dict]:
+    """
+    Prompts to run, one `{"prompt": ..., "id": ...}` object per line (or a
+    bare JSON string). Lines without an id are numbered from 1.
+    """
+    prompts = []
+    for number, record in enumerate(read_jsonl(path), start=1):
+        if isinstance(record, str):
+            record = {"prompt": record}
+        assert "prompt" in record, f"Line {number} of {path} has no prompt"
+        prompts.append({**record, "id": str(record.get("id", number))})
+
+    return prompts
+
+
+def finished_ids(path: Path) -> set[str]:
+    """Ids that already have a successful result in the output"""
+    return {r["id"] for r in read_jsonl(path) if not r.get("error")}
+
+
+class BatchWriter:
+    """Appends results to the output as they complete, one flushed line each"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd = open(path, "a")
+        if self._fd.tell() and not self._ends_with_newline():
+            self._fd.write("\n")  # terminate a line torn by an interruption
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as fd:
+            fd.seek(-1, os.SEEK_END)
+            return fd.read(1) == b"\n"
+
+    def write(self, result: dict) -> None:
+        self._fd.write(json.dumps(result) + "\n")
+        self._fd.flush()
+
+    def close(self) -> None:
+        self._fd.close()
+
+
+async def _run_one(assistant: "Assistant", item: dict) -> dict:
+    assistant.clear_history()  # every prompt is its own conversation
+    start = time.perf_counter()
+    first_token = None
+    response = ""
+    result = {"id": item["id"], "prompt": item["prompt"]}
+    try:
+        async for delta in assistant.astream(item["prompt"]):
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            response += delta
+        assistant.log_assistant_response(response)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    ledger = assistant.ledger
+    return {
+        **result,
+        "response": response,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "ttft_ms": round(first_token * 1000, 1) if first_token is not None else None,
+        "input_tokens": ledger.input_tokens,
+        "output_tokens": ledger.output_tokens,
+        "model": ledger.model,
+    }
+
+
+async def run_batch(
+    make_assistant: Callable[[], "Assistant"],
+    prompts: list[dict],
+    output: Path,
+    *,
+    concurrency: int,
+    on_result: Callable[[dict], None] | None = None,
+) -> int:
+    """
+    Run `prompts` with up to `concurrency` requests in flight, appending each
+    result to `output` as soon as it completes. Prompts that already have a
+    successful result in `output` are skipped, so an interrupted batch picks
+    up where it left off. Each worker owns an assistant, and the per-model
+    rate limiter they share keeps the whole batch under the API limits.
+    Returns the number of prompts run.
+    """
+    done = finished_ids(output)
+    queue: asyncio.Queue[dict] = asyncio.Queue()
+    for item in prompts:
+        if item["id"] not in done:
+            queue.put_nowait(item)
+    pending = queue.qsize()
+
+    writer = BatchWriter(output)
+
+    async def worker() -> None:
+        assistant = await asyncio.to_thread(make_assistant)
+        try:
+            while not queue.empty():
+                result = await _run_one(assistant, queue.get_nowait())
+                writer.write(result)
+                if on_result:
+                    on_result(result)
+        finally:
+            await assistant.aclose()
+
+    try:
+        workers = min(concurrency, pending)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+    finally:
+        writer.close()
+
+    return pending
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Iterator
+
+from .config import RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_TTL
+
+WORD = re.compile(r"\s*\S+\s*")
+
+
+def replay(content: str) -> Iterator[str]:
+    """Split a cached response into word sized deltas, like a live stream"""
+    yield from WORD.findall(content)
+
+
+class ResponseCache:
+    """
+    On-disk cache of complete responses, keyed by the exact request.
+
+    The key is a hash of the model and the messages sent (system prompt
+    included), with whitespace normalized, so the same question asked with
+    the same history gets answered from disk for free. Only responses that
+    streamed in completely are stored. Entries older than `ttl` seconds are
+    dropped, and once the cache grows past `max_bytes` the least recently
+    used entries go first.
+    """
+
+    FILENAME = "responses.db"
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        ttl: float = RESPONSE_CACHE_TTL,
+    ):
+        self.path = Path(path, self.FILENAME)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._db: sqlite3.Connection | None = None
+        self._lock = Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT,
+                    content TEXT,
+                    size INTEGER,
+                    created REAL,
+                    last_used REAL
+                );
+                CREATE INDEX IF NOT EXISTS responses_last_used
+                    ON responses (last_used);
+                """)
+
+        return self._db
+
+    @staticmethod
+    def key(model: str, messages: list[dict[str, str]]) -> str:
+        normalized = [(m["role"], " ".join(m["content"].split())) for m in messages]
+        data = json.dumps([model, normalized]).encode()
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    def get(self, model: str, messages: list[dict[str, str]]) -> str | None:
+        """The cached response to this exact request, if there is a fresh one"""
+        key = self.key(model, messages)
+        now = time.time()
+        with self._lock, self._connect() as db:
+            row = db.execute(
+                "SELECT content FROM responses WHERE key = ? AND created > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE responses SET last_used = ? WHERE key = ?", (now, key)
+                )
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    def put(self, model: str, messages: list[dict[str, str]], content: str) -> None:
+        if not content:
+            return
+
+        now = time.time()
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    self.key(model, messages),
+                    model,
+                    content,
+                    len(content.encode()),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(db, now)
+
+    def _evict(self, db: sqlite3.Connection, now: float) -> None:
+        db.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+        # keep the most recently used entries that fit in `max_bytes`
+        db.execute(
+            """
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM (
+                    SELECT key, SUM(size) OVER (ORDER BY last_used DESC) AS kept
+                    FROM responses
+                ) WHERE kept > ?
+            )
+            """,
+            (self.max_bytes,),
+        )
+
+    def clear(self) -> None:
+        with self._lock, self._connect() as db:
+            db.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """Hits and misses of this session, and what is on disk"""
+        with self._lock:
+            entries, size = (
+                self._connect()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses")
+                .fetchone()
+            )
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import stat
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from .args import SUMMARIZER_NAME
+from .batch import load_prompts, run_batch
+from .cache import ResponseCache
+from .conversation import Conversation, Message
+from .id import get_id
+from .store import ConversationStore, get_saved_conversations_path
+from .summarizer import make_summarizer
+
+if TYPE_CHECKING:
+    from .assistant import Assistant
+
+
+def search(query: str, limit: int = 20) -> None:
+    """Print the saved messages that best match `query`"""
+    store = ConversationStore(get_saved_conversations_path())
+    hits = store.search(query, limit)
+    if not hits:
+        print(f"No saved messages match {query!r}")
+        return
+
+    for hit in hits:
+        entry = store.entry(hit.conversation_id)
+        summary = entry.summary if entry else "?"
+        print(f"convo-id: 0x{hit.conversation_id} ({summary})")
+        print(f"  message-id: 0x{hit.message_id} [{hit.role}] {hit.snippet}")
+
+
+def cache_stats(cache: ResponseCache | None = None) -> None:
+    """Print the hits and misses of `cache` this run, and what it holds"""
+    if cache is None:
+        cache = ResponseCache(get_saved_conversations_path().parent)
+
+    stats = cache.stats()
+    print(
+        f"response cache: {stats['hits']} hits, {stats['misses']} misses"
+        f" ({stats['hit_rate']:.0%}), {stats['entries']} entries"
+        f" ({stats['bytes']} bytes) in {cache.path}",
+        file=sys.stderr,
+    )
+
+
+def stdin_is_piped() -> bool:
+    """A pipe or a redirected file, not a terminal (or anything else to hang on)"""
+    mode = os.fstat(sys.stdin.fileno()).st_mode
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+
+def read_prompt(prompt: str | None) -> str:
+    """`prompt`, followed by whatever was piped into stdin"""
+    parts = [prompt] if prompt else []
+    if stdin_is_piped():
+        piped = sys.stdin.read().strip()
+        if piped:
+            parts.append(piped)
+
+    return "\n\n".join(parts)
+
+
+async def _stream(assistant: "Assistant", prompt: str, response: list[str]) -> bool:
+    """Write the response to stdout (and `response`) as it arrives"""
+    try:
+        async for delta in assistant.astream(prompt):
+            response.append(delta)
+            sys.stdout.write(delta)
+            sys.stdout.flush()
+    except Exception as e:
+        print(f"\n{type(e).__name__}: {e}", file=sys.stderr)
+        return False
+    finally:
+        await assistant.aclose()
+
+    return True
+
+
+def ask(assistant: "Assistant", prompt: str, save: bool = False) -> int:
+    """
+    Answer `prompt` on stdout, without the TUI. Returns the exit status.
+    With `save`, the exchange is stored like any conversation from the TUI.
+    """
+    if not prompt.strip():
+        print("Nothing to ask, pass -p PROMPT or pipe a prompt in", file=sys.stderr)
+        return 2
+
+    chunks: list[str] = []
+    truncated = False
+    try:
+        ok = asyncio.run(_stream(assistant, prompt, chunks))
+    except KeyboardInterrupt:
+        ok, truncated = True, True  # keep what came in, like stopping in the TUI
+    response = "".join(chunks)
+    if sys.stdout.isatty() or not response.endswith("\n"):
+        sys.stdout.write("\n")
+
+    if save and ok:
+        summarizer = make_summarizer(SUMMARIZER_NAME, lambda: assistant)
+        conversation = Conversation(
+            id=get_id(),
+            summary=summarizer.summarize(prompt),
+            log=[
+                Message(id=get_id(), role="user", content=prompt),
+                Message(
+                    id=get_id(),
+                    role="assistant",
+                    content=response,
+                    truncated=truncated,
+                ),
+            ],
+        )
+        store = ConversationStore(get_saved_conversations_path())
+        path = store.save(conversation)
+        print(f"saved to {path}", file=sys.stderr)
+
+    return 0 if ok else 1
+
+
+def batch(
+    make_assistant: Callable[[], "Assistant"],
+    input_path: str,
+    output_path: str | None,
+    concurrency: int,
+) -> int:
+    """Run a JSONL file of prompts, reporting progress on stderr"""
+    source = Path(input_path)
+    output = Path(output_path) if output_path else source.with_suffix(".out.jsonl")
+    prompts = load_prompts(source)
+    failed = 0
+    completed = 0
+
+    def on_result(result: dict) -> None:
+        nonlocal completed, failed
+        completed += 1
+        failed += bool(result.get("error"))
+        status = "failed" if result.get("error") else f"{result['latency_ms']}ms"
+        print(f"[{completed}] {result['id']}: {status}", file=sys.stderr)
+
+    start = time.perf_counter()
+    try:
+        ran = asyncio.run(
+            run_batch(
+                make_assistant,
+                prompts,
+                output,
+                concurrency=concurrency,
+                on_result=on_result,
+            )
+        )
+    except KeyboardInterrupt:
+        print(f"Interrupted, rerun to resume ({output})", file=sys.stderr)
+        return 130
+
+    elapsed = time.perf_counter() - start
+    skipped = len(prompts) - ran
+    print(
+        f"{ran} prompts in {elapsed:.1f}s ({failed} failed, {skipped} already done)"
+        f" -> {output}",
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
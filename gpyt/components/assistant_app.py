@@ -1,24 +1,50 @@
-import json
-import os
+import asyncio
+import time
 from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator
 
 from textual import work
 from textual.app import App, ComposeResult
 from textual.binding import Binding
 from textual.widgets import Footer, Header, LoadingIndicator
 
-from gpyt.free_assistant import FreeAssistant
-from gpyt.palm_assistant import PalmAssistant
-
-from ..args import USE_EXPERIMENTAL_FREE_MODEL, USE_GPT4, USE_PALM_MODEL
-from ..assistant import Assistant
-from ..conversation import Conversation, Message
+from ..args import (
+    HEDGE_AFTER,
+    HEDGE_BACKEND,
+    METRICS_EXPORT,
+    PROFILE,
+    ROUTE_RULES_PATH,
+    SUMMARIZER_NAME,
+    USE_AUTO_ROUTING,
+    USE_EXPERIMENTAL_FREE_MODEL,
+    USE_GPT4,
+    USE_PALM_MODEL,
+)
+from ..backends import FREE, GPT, GPT4, PALM, BackendRegistry, choose
+from ..config import PROMPT, SUMMARY_PLACEHOLDER
+from ..conversation import Conversation, ConversationEntry, Message
+from ..hedge import SECONDARY, Hedger
 from ..id import get_id
+from ..ledger import Spend
+from ..metrics import SummaryMetrics, make_metrics
+from ..router import Router, load_rules
+from ..store import ConversationStore, get_saved_conversations_path
+from ..summarizer import make_summarizer
 from .assistant_responses import AssistantResponses
 from .options import Options
 from .past_conversations import PastConversations
 from .user_input import UserInput
 
+if TYPE_CHECKING:
+    from ..assistant import Assistant
+
+MODEL_LABELS = {
+    GPT: "GPT 3.5",
+    FREE: "GPT3.5 Free 🆓",
+    PALM: "PaLM 2 🌴",
+    GPT4: "GPT 4",
+}
+
 
 class AssistantApp(App):
 
@@ -32,6 +58,7 @@ class AssistantApp(App):
         Binding("down", "scroll_convo_down", "Scroll Down Convo", show=False),
         ("ctrl+o", "toggle_settings", "Settings"),
         ("ctrl+x", "toggle_input", "Hide/Show Input"),
+        ("escape", "cancel_response", "Stop Response"),
         Binding(
             "ctrl+t",
             "open_external_editor",
@@ -43,48 +70,112 @@ class AssistantApp(App):
 
     CSS_PATH = "styles.cssx"
 
-    def __init__(
-        self,
-        assistant: Assistant,
-        free_assistant: FreeAssistant,
-        palm: PalmAssistant,
-        gpt4: Assistant,
-    ):
+    def __init__(self, backends: BackendRegistry):
         super().__init__()
-        self.assistant = assistant
-        self._free_assistant = free_assistant
-        self._palm = palm
-        self._gpt4 = gpt4
+        self.backends = backends
+        self.store = ConversationStore(self.get_saved_conversations_path())
         self.conversations: list[Conversation] = []
         self.active_conversation: Conversation | None = None
+        self._spend: dict[str, Spend] = {}  # conversation id -> cost so far
         self._convo_ids_added: set[str] = set()
         self.use_free_gpt = USE_EXPERIMENTAL_FREE_MODEL
         self.use_palm = USE_PALM_MODEL
         self.use_gpt4 = USE_GPT4
+        self.use_auto = USE_AUTO_ROUTING
         self.use_default_model = not (
-            self.use_free_gpt or self.use_palm or self.use_gpt4
+            self.use_free_gpt or self.use_palm or self.use_gpt4 or self.use_auto
+        )
+        self.router = Router(
+            rules=load_rules(Path(ROUTE_RULES_PATH) if ROUTE_RULES_PATH else None)
         )
+        self.routed_backend: str | None = None  # last pick of `--auto`
         self.scrolled_during_response_stream = False
+        self.summarizer = make_summarizer(SUMMARIZER_NAME, self._get_assistant)
+        self.metrics = make_metrics(
+            METRICS_EXPORT, PROFILE, self.get_saved_conversations_path().parent
+        )
+        self.hedger: Hedger | None = None
+        self._hedge_assistant: "Assistant | None" = None
+        if HEDGE_BACKEND:
+            assert (
+                HEDGE_BACKEND in backends.names()
+            ), f"Unknown --hedge {HEDGE_BACKEND!r}, pick one of {backends.names()}"
+            self.hedger = Hedger(HEDGE_BACKEND, after=HEDGE_AFTER, metrics=self.metrics)
+
+    def _get_backend_name(self) -> str:
+        if self.use_auto and self.routed_backend:
+            return self.routed_backend
+        return choose(free=self.use_free_gpt, palm=self.use_palm, gpt4=self.use_gpt4)
+
+    def _route(self, user_input: str) -> str:
+        """The backend `--auto` sends `user_input` to, given the history so far"""
+        log = self.active_conversation.log if self.active_conversation else []
+        tokens = self.router.estimate(
+            [PROMPT, *(message.content for message in log), user_input]
+        )
+        return self.router.route(tokens, user_input)
 
-    def _get_assistant(self) -> Assistant | FreeAssistant | PalmAssistant:
-        if self.use_palm:
-            return self._palm
-        if self.use_free_gpt:
-            return self._free_assistant
-        if self.use_gpt4:
-            return self._gpt4
+    def spend_of(self, conversation: Conversation) -> Spend:
+        """What `conversation` cost this session, over all the backends it used"""
+        return self._spend.setdefault(conversation.id, Spend())
 
-        return self.assistant
+    def _get_assistant(self) -> "Assistant":
+        """Return the selected backend, building it if this is its first use"""
+        return self.backends.get(self._get_backend_name())
 
-    def adjust_model_border_title(self) -> None:
-        model = "GPT 3.5"
+    def _get_hedge_assistant(self) -> "Assistant":
+        """
+        The backend `--hedge` races, its own instance even when it's the
+        selected backend, so both can stream at once
+        """
+        assert self.hedger, "Hedging is off"
+        if self._hedge_assistant is None:
+            self._hedge_assistant = self.backends.build(self.hedger.secondary)
+        return self._hedge_assistant
+
+    async def _hedge_stream(
+        self, user_input: str, conversation: Conversation
+    ) -> AsyncIterator[str]:
+        """Ask the hedge backend, given the conversation so far"""
+        assistant = await asyncio.to_thread(self._get_hedge_assistant)
+        if assistant.log is not conversation.log:
+            assistant.attach(conversation.log, self.spend_of(conversation))
+        stream = assistant.astream(user_input, logged=True)
+        try:
+            async for delta in stream:
+                yield delta
+        finally:
+            await stream.aclose()
+
+    def on_mount(self) -> None:
+        self.warm_up_assistant()
+
+    async def on_unmount(self) -> None:
+        """Close the connections of every backend used, hedge included"""
+        assistants = self.backends.built()
+        if self._hedge_assistant is not None:
+            assistants.append(self._hedge_assistant)
+        await asyncio.gather(
+            *(assistant.aclose() for assistant in assistants), return_exceptions=True
+        )
 
-        if self.use_free_gpt:
-            model = "GPT3.5 Free 🆓"
-        elif self.use_palm:
-            model = "PaLM 2 🌴"
-        elif self.use_gpt4:
-            model = "GPT 4"
+    @work(exit_on_error=False)
+    async def warm_up_assistant(self) -> None:
+        """
+        Build the selected backend off the UI thread so startup stays snappy,
+        then connect to its API so the first request skips the handshake.
+        A failed build is retried (and surfaced) on first real use.
+        """
+        assistant = await asyncio.to_thread(self._get_assistant)
+        await assistant.warm_up()
+        if self.hedger:
+            hedge = await asyncio.to_thread(self._get_hedge_assistant)
+            await hedge.warm_up()
+
+    def adjust_model_border_title(self) -> None:
+        model = MODEL_LABELS.get(self._get_backend_name(), self._get_backend_name())
+        if self.use_auto:
+            model = f"Auto 🧭 {model}" if self.routed_backend else "Auto 🧭"
 
         self.user_input.border_title = f"Model: {model}"
 
@@ -102,42 +193,83 @@ class AssistantApp(App):
         yield self.assistant_responses
         self.past_conversations = PastConversations(classes="hidden", app=self)
         self.past_conversations.border_title = "Past Conversations"
-        self.past_conversations.border_subtitle = "Press Enter to Select"
+        self.past_conversations.border_subtitle = PastConversations.HINT
         self.adjust_model_border_title()
         yield self.past_conversations
         yield Options(classes="hidden", app=self)
 
     def get_saved_conversations_path(self) -> Path:
         """Return the path where conversations are to be saved/loaded from"""
-        GPT_CACHE_DIR = os.getenv("GPT_CACHE_DIR")
-        HOME_DIR = os.getenv("HOME")
-
-        if not GPT_CACHE_DIR:
-            # if no GPT_CACHE_DIR env provided, default to $HOME... ensure it exists!
-            assert HOME_DIR, "Missing $HOME env var"
-
-        return Path(
-            GPT_CACHE_DIR if GPT_CACHE_DIR else HOME_DIR,  # type: ignore
-            ".cache",
-            "gpyt",
-            "conversations",
-        )
+        return get_saved_conversations_path()
 
     def load_saved_conversations(self) -> None:
-        """Load conversations from saved conversation path"""
-        conversations_path = self.get_saved_conversations_path()
-        conversation_file_paths = conversations_path.glob(pattern=r"*.json")
-        conversation_file_paths = sorted(
-            conversation_file_paths, key=lambda f: f.stat().st_mtime
-        )
+        """
+        List saved conversations in the sidebar. Only the manifest is read,
+        a conversation itself is loaded once it is selected.
+        """
+        self.store.migrate_legacy()
+
+        entries = self.store.entries()
+        self._convo_ids_added.update(entry.id for entry in entries)
+        self.past_conversations.set_conversation_options(entries[::-1])
+
+    def search_conversations(self, query: str) -> None:
+        """List the conversations matching `query` best first, or all of them"""
+        if not query.strip():
+            self.past_conversations.set_conversation_options(self.store.entries()[::-1])
+            return
+
+        if not self.store.search_ready:
+            self.build_search_index(query)  # lists the hits once it's done
+            return
 
-        for path in conversation_file_paths:
-            with open(path, "r") as fd:
-                raw_json = json.load(fd)
-                conversation = Conversation.parse_obj(raw_json)
-                self.conversations.append(conversation)
-                self._convo_ids_added.add(conversation.id)
-                self.past_conversations.add_conversation_option(conversation)
+        self._show_search_hits(query)
+
+    @work(group="search", exclusive=True, exit_on_error=False)
+    async def build_search_index(self, query: str | None = None) -> None:
+        """
+        Index every saved conversation off the UI thread (once, the first
+        search needs it), then search for `query`
+        """
+        self.past_conversations.show_indexing(True)
+        try:
+            await asyncio.to_thread(self.store.build_search_index)
+        except asyncio.CancelledError:
+            raise  # a newer search took over, it waits for the same build
+        except Exception:
+            self.past_conversations.show_indexing(False)
+            raise
+        self.past_conversations.show_indexing(False)
+
+        if query is not None:
+            self._show_search_hits(query)
+
+    def _show_search_hits(self, query: str) -> None:
+        entries = []
+        seen = set()
+        for hit in self.store.search(query, limit=100):
+            entry = self.store.entry(hit.conversation_id)
+            if entry and entry.id not in seen:
+                seen.add(entry.id)
+                entries.append(entry)
+
+        self.past_conversations.set_conversation_options(entries)
+
+    def load_conversation(self, conversation_id: str) -> Conversation | None:
+        """
+        Read a saved conversation's full log from disk, unless it's already
+        open, in which case the open one (at least as new as the file) is used.
+        """
+        for conversation in self.conversations:
+            if conversation.id == conversation_id:
+                return conversation
+
+        if not self.store.exists(conversation_id):
+            return None
+
+        conversation = self.store.load(self.store.path_for(conversation_id))
+        self.conversations.append(conversation)
+        return conversation
 
     def save_active_conversation_to_disk(self) -> str:
         """Save the active conversation to disk and return the file path"""
@@ -156,13 +288,7 @@ class AssistantApp(App):
             ), "When not supplied a conversation to save to disk, there must be an active conversation!"
             conversation = self.active_conversation
 
-        conversations_path = self.get_saved_conversations_path()
-
-        os.makedirs(conversations_path, exist_ok=True)
-
-        path = Path(conversations_path, f"convo-{conversation.id}.json")
-        with open(path, "w") as fd:
-            json.dump(conversation.dict(), fd)
+        path = self.store.save(conversation)  # only appends what's new
 
         self._add_active_as_option()
 
@@ -173,11 +299,47 @@ class AssistantApp(App):
         self.assistant_responses.border_subtitle = f"convo-id: 0x{id}"
 
     def _setup_fresh_convo(self, initial_user_input: str) -> None:
-        summary = self._get_assistant().get_conversation_summary(initial_user_input)
+        summary = SUMMARY_PLACEHOLDER
+        if not self.summarizer.blocking:
+            summary = self._summarize(initial_user_input)
         new_convo = Conversation(id=get_id(), summary=summary, log=[])
         self._set_summary_title_id(summary, new_convo.id)
         self.conversations.append(new_convo)
         self.active_conversation = new_convo
+        if self.summarizer.blocking:
+            self.summarize_conversation(new_convo, initial_user_input)
+
+    def _summarize(self, initial_user_input: str) -> str:
+        start = time.perf_counter()
+        summary = self.summarizer.summarize(initial_user_input)
+        self.metrics.record(
+            SummaryMetrics(
+                time=time.time(),
+                summarizer=SUMMARIZER_NAME,
+                summary_ms=(time.perf_counter() - start) * 1000,
+            )
+        )
+        return summary
+
+    @work(exit_on_error=False)
+    async def summarize_conversation(
+        self, conversation: Conversation, initial_user_input: str
+    ) -> None:
+        """
+        Title `conversation` while its first response streams in, rather than
+        making the first token wait on a whole extra round trip.
+        """
+        summary = await asyncio.to_thread(self._summarize, initial_user_input)
+        conversation.summary = summary
+        if self.active_conversation is conversation:
+            self.assistant_responses.show_token_usage()  # retitles the header
+        if not self.store.exists(conversation.id):
+            return  # the first save will write it
+
+        self.store.save(conversation)  # the response finished first
+        self.past_conversations.update_conversation_option(
+            ConversationEntry.from_conversation(conversation, time.time())
+        )
 
     def clear_active_conversation(self) -> None:
         """
@@ -185,7 +347,7 @@ class AssistantApp(App):
         current conversation history and resetting it.
         """
         self.assistant_responses.remove()
-        self.assistant.clear_history()
+        self._get_assistant().clear_history()
         self.assistant_responses = AssistantResponses(app=self)
         self.mount(self.assistant_responses)
         self.assistant_responses.border_title = "Conversation History"
@@ -197,13 +359,14 @@ class AssistantApp(App):
         """
         if not self.active_conversation:
             return
-        exists_already = Path(
-            self.get_saved_conversations_path(),
-            f"convo-{self.active_conversation.id}.json",
-        ).exists()
+        exists_already = self.store.exists(self.active_conversation.id)
 
         if exists_already and self.active_conversation.id not in self._convo_ids_added:
-            self.past_conversations.add_conversation_option(self.active_conversation)
+            self.past_conversations.add_conversation_option(
+                ConversationEntry.from_conversation(
+                    self.active_conversation, time.time()
+                )
+            )
 
         self._convo_ids_added.add(self.active_conversation.id)
 
@@ -212,6 +375,7 @@ class AssistantApp(App):
         if not self.active_conversation:
             return
 
+        self.cancel_response()  # stop paying for a response nobody will read
         self.save_active_conversation_to_disk()
         if add_option:
             self._add_active_as_option()
@@ -220,27 +384,48 @@ class AssistantApp(App):
         self.action_toggle_sidebar()
 
     @work()
-    def fetch_assistant_response(self, user_input: str) -> None:
+    async def fetch_assistant_response(self, user_input: str) -> None:
+        """
+        Runs on the event loop: the response is streamed with `astream` and
+        rendered as it arrives, no thread hops per chunk.
+        """
+        if self.use_auto:
+            self.routed_backend = await asyncio.to_thread(self._route, user_input)
+            self.adjust_model_border_title()
+
+        # the first use of a backend builds it, don't block the UI doing so
+        assistant = await asyncio.to_thread(self._get_assistant)
         if self.active_conversation is None:
             self._setup_fresh_convo(user_input)
 
-        assert self.active_conversation, "No active conversation during log write"
+        conversation = self.active_conversation
+        assert conversation, "No active conversation during log write"
+        if assistant.log is not conversation.log:
+            # a new conversation, or another backend was selected (or routed to)
+            assistant.attach(conversation.log, self.spend_of(conversation))
         user_message = Message(id=get_id(), role="user", content=user_input)
-        self.active_conversation.log.append(user_message)
+        conversation.log.append(user_message)
 
-        try:
-            assistant_response_stream = self._get_assistant().get_response_stream(
-                user_input
+        backend = self._get_backend_name()
+        stream = self.router.timed(
+            backend, assistant.astream(user_input, logged=True)  # appended above
+        )
+        hedged = None
+        if self.hedger:
+            stream = hedged = self.hedger.stream(
+                backend,
+                stream,
+                lambda: self._hedge_stream(user_input, conversation),
             )
-        except:
-            assistant_response_stream = self._get_assistant().error_fallback_message
 
-        self.app.call_from_thread(self.assistant_responses.mount, LoadingIndicator())
+        def answered_by() -> "Assistant":
+            if hedged and hedged.winner == SECONDARY:
+                return self._get_hedge_assistant()
+            return assistant
 
-        self.app.call_from_thread(
-            self.assistant_responses.add_response,
-            message=user_message,
-            stream=assistant_response_stream,
+        await self.assistant_responses.mount(LoadingIndicator())
+        await self.assistant_responses.add_response(
+            stream=stream, message=user_message, answered_by=answered_by
         )
 
     def on_select_previous_conversation(self, conversation: Conversation) -> None:
@@ -248,6 +433,13 @@ class AssistantApp(App):
         self.assistant_responses.setup_from_presaved_conversation(conversation)
         self.assistant_responses.container.scroll_end(duration=2.0, easing="in_quart")
 
+    def cancel_response(self) -> bool:
+        """Stop the response being streamed in, returns whether there was one"""
+        return self.assistant_responses.cancel_response()
+
+    def action_cancel_response(self) -> None:
+        self.cancel_response()
+
     def action_toggle_dark(self) -> None:
         self.dark = not self.dark
 
@@ -257,12 +449,14 @@ class AssistantApp(App):
                 self.load_saved_conversations()
             except:
                 self.past_conversations.add_conversation_option(
-                    Conversation(
+                    ConversationEntry(
                         summary=f"Failed to load conversations from {self.get_saved_conversations_path()}",
                         id="-1",
-                        log=[],
+                        mtime=0,
+                        messages=0,
                     )
                 )
+            self.build_search_index()  # ahead of the first search
         self.past_conversations.add_class("opened-gt-once")
         self.past_conversations.toggle_class("hidden")
         if self.past_conversations.has_class("hidden"):
@@ -289,7 +483,10 @@ class AssistantApp(App):
         self.user_input.toggle_class("hidden")
 
     def action_scroll_convo_up(self) -> None:
-        self.assistant_responses.container.scroll_relative(y=-4)
+        container = self.assistant_responses.container
+        if container.scroll_y == 0:  # already at the top, nothing to scroll
+            self.assistant_responses.load_earlier()
+        container.scroll_relative(y=-4)
         self.scrolled_during_response_stream = True
 
     def action_scroll_convo_down(self) -> None:
@@ -1,8 +1,9 @@
 import pyperclip
-from textual import work
 from textual.app import ComposeResult
 from textual.containers import Container
-from textual.widgets import Label, Markdown, Static
+from textual.widgets import Label, Static
+
+from .streaming_markdown import StreamingMarkdown
 
 
 class AssistantResponse(Static):
@@ -12,8 +13,7 @@ class AssistantResponse(Static):
         super().__init__()
         self.question = question
         self._id = id
-        self.response_view = Markdown()
-        self._last_content = ""
+        self.response_view = StreamingMarkdown()
 
     def compose(self) -> ComposeResult:
         self.user_question = Label(f"😀: {self.question}", classes="convo")
@@ -24,9 +24,8 @@ class AssistantResponse(Static):
         yield container
 
     def on_click(self) -> None:
-        pyperclip.copy(self._last_content)
+        pyperclip.copy(self.response_view.document)
 
-    @work()
     def update_response(self, content: str) -> None:
-        self.app.call_from_thread(self.response_view.update, content)
-        self._last_content = content
+        """Render `content`, only the part that changed since last time is parsed"""
+        self.response_view.update(content)
@@ -1,13 +1,41 @@
-from textual import work
+import asyncio
+import time
+
 from textual.app import ComposeResult
 from textual.containers import ScrollableContainer
+from textual.widget import Widget
+from textual.timer import Timer
 from textual.widgets import LoadingIndicator, Static
-from typing import Generator
+from typing import TYPE_CHECKING, AsyncIterator, Callable
 
+from ..config import HISTORY_LOAD_MARGIN, HISTORY_PAGE_TURNS, RENDER_FPS
 from ..conversation import Conversation, Message
 from ..id import get_id
+from ..metrics import ResponseMetrics
 from .assistant_response import AssistantResponse
 
+if TYPE_CHECKING:
+    from ..assistant import Assistant
+
+TRUNCATED_MARKER = "\n\n*(response stopped)*"
+
+
+class EarlierTurns(Static):
+    """How many turns aren't rendered yet, click (or enter) renders a page more"""
+
+    can_focus = True
+    BINDINGS = [("enter", "load", "Load Earlier")]
+
+    def __init__(self, load: Callable[[], None]):
+        super().__init__(classes="convo earlier")
+        self._load = load
+
+    def on_click(self) -> None:
+        self._load()
+
+    def action_load(self) -> None:
+        self._load()
+
 
 class AssistantResponses(Static):
     """Container for individual AssistantResponse widgets"""
@@ -16,89 +44,241 @@ class AssistantResponses(Static):
         super().__init__()
         self.container = ScrollableContainer()
         self._app = app
+        self._streaming: asyncio.Task | None = None
+        self._earlier_turns: list[tuple[Message, Message]] = []  # not rendered yet
+        self._earlier: EarlierTurns | None = None
 
     def compose(self) -> ComposeResult:
         yield self.container
 
     def setup_from_presaved_conversation(self, conversation: Conversation) -> None:
-        """Load conversation into conversation history widget from Conversation model"""
+        """
+        Load conversation into conversation history widget from Conversation
+        model. Only the latest turns are rendered up front, earlier ones are
+        rendered a page at a time as the user scrolls up to them (or clicks
+        the count of them), so opening a long conversation costs the same as
+        opening a short one.
+        """
 
         self._app.active_conversation = conversation
         self._app._set_summary_title_id(conversation.summary, conversation.id)
-        new_history = []
 
         all_user_messages = [m for m in conversation.log if m.role == "user"]
         all_assistant_messages = [m for m in conversation.log if m.role == "assistant"]
+        turns = list(zip(all_user_messages, all_assistant_messages))
+        self._earlier_turns = turns[:-HISTORY_PAGE_TURNS]
+        self.container.mount_all(self._render_turns(turns[-HISTORY_PAGE_TURNS:]))
+        if self._earlier_turns:
+            self._earlier = EarlierTurns(self.load_earlier)
+            self._show_earlier_count()
+            self.container.mount(self._earlier, before=0)
+            self.watch(self.container, "scroll_y", self._on_history_scroll, init=False)
+            self.call_after_refresh(self._fill_viewport)
 
-        for user_message, assistant_response in zip(
-            all_user_messages, all_assistant_messages
-        ):
+        self._app._get_assistant().attach(  # viewed, not copied
+            conversation.log, self._app.spend_of(conversation)
+        )
+        self._app.past_conversations.add_class("hidden")
+        self._app.focus_user_input()
+
+    def _render_turns(self, turns: list[tuple[Message, Message]]) -> list[Widget]:
+        widgets = []
+        for user_message, assistant_response in turns:
             assert (
                 user_message.role == "user"
             ), "Improper role for setup from presaved convesation"
+            assert (
+                assistant_response.role == "assistant"
+            ), "Improper role for setup from presaved convesation"
 
             new_response = AssistantResponse(
                 question=user_message.content, id=user_message.id
             )
-            self.container.mount(new_response)
-            assert (
-                assistant_response.role == "assistant"
-            ), "Improper role for setup from presaved convesation"
-            new_response.update_response(assistant_response.content)
-            new_history.append({"role": "user", "content": user_message.content})
-            new_history.append(
-                {"role": "assistant", "content": assistant_response.content}
+            new_response.update_response(  # rendered once it's mounted
+                assistant_response.content + TRUNCATED_MARKER
+                if assistant_response.truncated
+                else assistant_response.content
             )
+            widgets.append(new_response)
 
-        self._app._get_assistant().set_history(new_history)
-        self._app.past_conversations.add_class("hidden")
-        self._app.focus_user_input()
+        return widgets
 
-    @work()
-    def add_response(self, stream: Generator, message: Message) -> None:
+    def _show_earlier_count(self) -> None:
+        assert self._earlier, "No earlier turns to count"
+        count = len(self._earlier_turns)
+        self._earlier.update(f"⬆ {count} earlier question{'s' * (count != 1)}")
+
+    def _on_history_scroll(self, old_y: float, scroll_y: float) -> None:
+        if scroll_y >= old_y or scroll_y > HISTORY_LOAD_MARGIN:
+            return  # only the user scrolling up to the top loads more
+        self.load_earlier()
+
+    def _fill_viewport(self) -> None:
+        """
+        Render earlier pages until the turns overflow the view, otherwise it
+        can't be scrolled up to load the rest
+        """
+        if self._earlier_turns and self.container.max_scroll_y == 0:
+            self.load_earlier()
+
+    def load_earlier(self) -> None:
+        """Render the page of turns before the ones shown, if there is one"""
+        if not self._earlier_turns:
+            return
+
+        page = self._earlier_turns[-HISTORY_PAGE_TURNS:]
+        del self._earlier_turns[-HISTORY_PAGE_TURNS:]
+        widgets = self._render_turns(page)
+        self.container.mount_all(widgets, after=self._earlier)
+        if self._earlier_turns:
+            self._show_earlier_count()
+        elif self._earlier:
+            self._earlier.remove()
+
+        def keep_position() -> None:
+            # the new turns went in above the viewport, don't jump to them
+            added = sum(widget.outer_size.height for widget in widgets)
+            self.container.scroll_to(y=self.container.scroll_y + added, animate=False)
+            self._fill_viewport()
+
+        self.call_after_refresh(keep_position)
+
+    def cancel_response(self) -> bool:
+        """
+        Stop the response that is streaming in, if there is one. What arrived
+        so far is kept and logged as truncated.
+        """
+        if not self._streaming or self._streaming.done():
+            return False
+
+        self._streaming.cancel()
+        return True
+
+    async def add_response(
+        self,
+        stream: AsyncIterator[str],
+        message: Message,
+        answered_by: "Callable[[], Assistant] | None" = None,
+    ) -> None:
+        """
+        Render `stream`, the answer to `message`, as it comes in. The backend
+        that produced it, `answered_by()` (the selected one by default), is
+        asked once it has ended: a hedged request's winner is only known then.
+        """
         new_response = AssistantResponse(question=message.content, id=message.id)
-        self._app.call_from_thread(self.container.mount, new_response)
-        self._app.call_from_thread(new_response.scroll_visible)
+        await self.container.mount(new_response)
+        new_response.scroll_visible()
         self._app.scrolled_during_response_stream = False
+        _assistant = self._app._get_assistant()
+        conversation = self._app.active_conversation
+        assert conversation, "No active conversation during log write"
+        metrics = ResponseMetrics(
+            time=time.time(),
+            model=_assistant.ledger.model,
+            conversation_id=conversation.id,
+        )
+        answered_by = answered_by or self._app._get_assistant
         markdown = ""
-        update_frequency = 10
-        i = 0
-        for data in stream:
-            i += 1
-            try:  # HACK: should check for attr, not try/except
-                if self._app.use_free_gpt or self._app.use_palm:
-                    markdown = markdown + data
-                else:
-                    markdown = markdown + data["choices"][0]["delta"]["content"]
-                if i % update_frequency == 0:
-                    self._app.call_from_thread(new_response.update_response, markdown)
-                    if not self._app.scrolled_during_response_stream:
-                        self._app.call_from_thread(self.container.scroll_end)
-            except:
-                continue
-
-        self._app.call_from_thread(new_response.update_response, markdown)
-        self._app.call_from_thread(
-            new_response.user_question.scroll_visible, duration=2, easing="out_back"
+        frame_budget = 1 / RENDER_FPS
+        last_render = 0.0
+        flush: Timer | None = None  # paints what arrived since the last frame
+
+        def render() -> None:
+            nonlocal last_render, flush
+            flush = None
+            last_render = time.monotonic()
+            render_start = time.perf_counter()
+            new_response.update_response(markdown)
+            self._record_render(metrics, render_start)
+            self.show_token_usage()
+            if not self._app.scrolled_during_response_stream:
+                self.container.scroll_end()
+
+        start = first_token = time.perf_counter()
+        self._streaming = asyncio.current_task()
+        try:
+            with self._app.metrics.profile(f"response-{message.id}"):
+                async for delta in stream:
+                    if metrics.ttft_ms is None:
+                        first_token = time.perf_counter()
+                        metrics.ttft_ms = (first_token - start) * 1000
+                    markdown = markdown + delta  # billed by the backend streaming it
+                    wait = last_render + frame_budget - time.monotonic()
+                    if wait <= 0:
+                        if flush:
+                            flush.stop()
+                        render()
+                    elif flush is None:  # the next chunk may be a while
+                        flush = self.set_timer(wait, render)
+        except asyncio.CancelledError:
+            metrics.truncated = True
+        except Exception:
+            metrics.failed = True
+        finally:
+            self._streaming = None
+            if flush:
+                flush.stop()  # the final render below covers it
+            await stream.aclose()  # drops the upstream HTTP stream right away
+        end = time.perf_counter()
+        source = answered_by()
+        metrics.model = source.ledger.model
+        metrics.output_tokens = source.get_tokens_used(markdown)
+        metrics.cached = source.ledger.replaying
+        if metrics.failed:
+            markdown = markdown + source.error_message
+        metrics.duration_ms = (end - start) * 1000
+        if metrics.ttft_ms is not None and end > first_token:
+            metrics.tokens_per_second = metrics.output_tokens / (end - first_token)
+        truncated = metrics.truncated
+
+        # a new conversation may have been started while this one streamed in
+        still_active = self._app.active_conversation is conversation
+        assistant_message = Message(
+            id=get_id(), role="assistant", content=markdown, truncated=truncated
         )
-        self._app._get_assistant().log_assistant_response(markdown)
-        assistant_message = Message(id=get_id(), role="assistant", content=markdown)
-        assert self._app.active_conversation, "No active conversation during log write"
-        self._app.active_conversation.log.append(assistant_message)
+        conversation.log.append(assistant_message)
+        if still_active:
+            _assistant.log_assistant_response(markdown, logged=True)
+        save_start = time.perf_counter()
+        self._app.save_conversation_to_disk(conversation)
+        metrics.save_ms = (time.perf_counter() - save_start) * 1000
 
-        self._app.call_from_thread(self._app.save_active_conversation_to_disk)
+        if not self.is_attached:
+            self._app.metrics.record(metrics)
+            return
+
+        render_start = time.perf_counter()
+        new_response.update_response(
+            markdown + TRUNCATED_MARKER if truncated else markdown
+        )
+        self._record_render(metrics, render_start)
+        self._app.metrics.record(metrics)
+        new_response.user_question.scroll_visible(duration=2, easing="out_back")
 
         loading_indicator = self.query_one(LoadingIndicator)
         if loading_indicator:
-            self._app.call_from_thread(loading_indicator.remove)
-            print("deleting loading indicator")
+            loading_indicator.remove()
 
-        # counting tokens
-        _assistant = self._app._get_assistant()
-        _assistant.update_token_usage_for_input(
-            in_message=message.content, out_message=markdown
-        )
-        token_usage = f" -- tokens: {_assistant.tokens_used_this_convo()} | ${_assistant.price_of_this_convo:.8f} | {_assistant.model}"
+        if still_active:
+            self.show_token_usage()
+
+    @staticmethod
+    def _record_render(metrics: ResponseMetrics, start: float) -> None:
+        elapsed = (time.perf_counter() - start) * 1000
+        metrics.renders += 1
+        metrics.render_ms_total += elapsed
+        metrics.render_ms_max = max(metrics.render_ms_max, elapsed)
+
+    def show_token_usage(self) -> None:
+        """Show the running token count and price of the active conversation"""
+        conversation = self._app.active_conversation
+        if not conversation:
+            return
+
+        # summed over every backend that answered (routed, selected or raced)
+        spend = self._app.spend_of(conversation)
+        model = self._app._get_assistant().ledger.model
+        token_usage = f" -- tokens: {spend.total_tokens} | ${spend.price:.8f} | {model}"
         self._app._set_summary_title_id(
             self._app.active_conversation.summary + token_usage,
             self._app.active_conversation.id,
@@ -1,6 +1,6 @@
 from textual.widgets import Label, ListItem
 from textual.app import ComposeResult
-from ..conversation import Conversation
+from ..conversation import ConversationEntry
 
 
 class StartNewConversationOption(ListItem):
@@ -25,13 +25,19 @@ class StartNewConversationOption(ListItem):
 class ConversationOption(ListItem):
     ELLIPSIFY_CUTOFF = 35
 
-    def __init__(self, conversation: Conversation, app):
+    def __init__(self, entry: ConversationEntry, app):
         super().__init__()
-        self.conversation = conversation
+        self.entry = entry
         self._app = app
 
     def compose(self) -> ComposeResult:
-        yield Label(self._ellipsify_long_summary(self.conversation.summary))
+        self.label = Label(self._ellipsify_long_summary(self.entry.summary))
+        yield self.label
+
+    def set_entry(self, entry: ConversationEntry) -> None:
+        self.entry = entry
+        if hasattr(self, "label"):
+            self.label.update(self._ellipsify_long_summary(entry.summary))
 
     def _ellipsify_long_summary(self, summary: str) -> str:
         if len(summary) < ConversationOption.ELLIPSIFY_CUTOFF:
@@ -41,5 +47,7 @@ class ConversationOption(ListItem):
         return summary
 
     def select(self) -> None:
-        self._app.on_select_previous_conversation(self.conversation)
-        # app.assistant_responses.setup_from_presaved_conversation(self.conversation)
+        conversation = self._app.load_conversation(self.entry.id)
+        if not conversation:
+            return
+        self._app.on_select_previous_conversation(conversation)
@@ -22,11 +22,13 @@ class Options(RadioSet):
         self.use_free = RadioButton("Use Free Model (experimental)", id="use_free_gpt")
         self.use_palm = RadioButton("Use PaLM 2 (Google)", id="use_palm")
         self.use_gpt4 = RadioButton("Use GPT4 (Access Required)", id="use_gpt4")
+        self.use_auto = RadioButton("Pick Automatically (per request)", id="use_auto")
 
         yield self.use_default
         yield self.use_free
         yield self.use_palm
         yield self.use_gpt4
+        yield self.use_auto
 
     def on_radio_set_changed(self, event):
         option = event.pressed.id
@@ -35,7 +37,9 @@ class Options(RadioSet):
             self._app.use_default_model = False
             self._app.use_palm = False
             self._app.use_gpt4 = False
+            self._app.use_auto = False
 
         if hasattr(self._app, option):
             self._app.__dict__[option] = True
             self._app.adjust_model_border_title()
+            self._app.warm_up_assistant()  # first switch builds the backend
@@ -1,20 +1,62 @@
 from textual.containers import Container
 from textual.app import ComposeResult
+from textual.widgets import Input
 from .conversation_option import StartNewConversationOption, ConversationOption
 from .vim_list import VimLikeListView
-from ..conversation import Conversation
+from ..conversation import ConversationEntry
 
 
 class PastConversations(Container):
+    BINDINGS = [("slash", "focus_search", "Search")]
+
+    HINT = "Press Enter to Select"
+    INDEXING_HINT = "Building search index..."
+
     def __init__(self, app, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._app = app
 
     def compose(self) -> ComposeResult:
+        self.search = Input(placeholder="/ to search", id="conversation-search")
+        yield self.search
         self.start_new_conversation_option = StartNewConversationOption(app=self._app)
-        self.options = VimLikeListView(self.start_new_conversation_option)
+        self.options = VimLikeListView(
+            self.start_new_conversation_option, make_item=self._make_option
+        )
         yield self.options
 
-    def add_conversation_option(self, conversation: Conversation) -> None:
-        option = ConversationOption(conversation, app=self._app)
-        self.options.mount(option, before=1)
+    def _make_option(self, entry: ConversationEntry) -> ConversationOption:
+        return ConversationOption(entry, app=self._app)
+
+    def set_conversation_options(self, entries: list[ConversationEntry]) -> None:
+        """Replace all listed conversations, most recent first"""
+        self.options.set_rows(entries)
+
+    def add_conversation_option(self, entry: ConversationEntry) -> None:
+        self.options.insert_row(entry)
+
+    def update_conversation_option(self, entry: ConversationEntry) -> None:
+        """Show the latest summary of an already listed conversation"""
+        rows = self.options.rows
+        for i, row in enumerate(rows):
+            if row.id == entry.id:
+                rows[i] = entry
+        for option in self.options.query(ConversationOption):
+            if option.entry.id == entry.id:
+                option.set_entry(entry)
+
+    def show_indexing(self, indexing: bool) -> None:
+        """Say the search index is being built, results come once it's done"""
+        self.border_subtitle = self.INDEXING_HINT if indexing else self.HINT
+
+    def action_focus_search(self) -> None:
+        self.search.focus()
+
+    def on_input_submitted(self, event: Input.Submitted) -> None:
+        event.stop()
+        self._app.search_conversations(event.value)
+        self._app.set_focus(self.options)
+
+    def on_descendant_focus(self, _) -> None:
+        if self.has_class("hidden"):  # don't let tab land on an off-screen input
+            self._app.focus_user_input()
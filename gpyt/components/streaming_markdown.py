@@ -0,0 +1,98 @@
+import re
+
+from textual.app import ComposeResult
+from textual.widget import Widget
+from textual.widgets import Markdown
+
+FENCE = re.compile(r"^ {0,3}(```|~~~)")
+LIST_ITEM = re.compile(r"^([-*+]|\d+[.)])\s")
+
+
+def find_block_boundary(text: str, start: int = 0) -> int:
+    """
+    Return the offset of the last point in `text` (at or after `start`) where
+    everything before it is made of finished Markdown blocks.
+
+    A block is finished once a blank line outside of a code fence is followed
+    by a line that starts a new top-level block. Indented lines and list items
+    might still belong to the previous block, so they never start one.
+    """
+    boundary = start
+    position = start
+    in_fence = False
+    after_blank = False
+
+    for line in text[start:].splitlines(keepends=True):
+        if not line.endswith("\n"):
+            break  # still streaming in
+
+        if FENCE.match(line):
+            if not in_fence and after_blank:
+                boundary = position
+            in_fence = not in_fence
+            after_blank = False
+        elif in_fence:
+            pass
+        elif not line.strip():
+            after_blank = True
+        else:
+            if after_blank and not line[0].isspace() and not LIST_ITEM.match(line):
+                boundary = position
+            after_blank = False
+
+        position += len(line)
+
+    return boundary
+
+
+class StreamingMarkdown(Widget):
+    """
+    Markdown view for a document that keeps growing.
+
+    Finished blocks are rendered once into their own Markdown widget and never
+    parsed again, only the trailing block that is still open gets re-parsed on
+    each update.
+    """
+
+    DEFAULT_CSS = """
+    StreamingMarkdown {
+        height: auto;
+        layout: vertical;
+    }
+
+    StreamingMarkdown > .finished {
+        margin-bottom: 0;
+    }
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.document = ""
+        self._finished = 0  # characters of `document` frozen into segments
+        self._tail = Markdown()
+
+    def compose(self) -> ComposeResult:
+        yield self._tail
+
+    def on_mount(self) -> None:
+        if self.document:
+            document, self.document = self.document, ""
+            self.update(document)
+
+    def update(self, document: str) -> None:
+        if self._tail.parent is not self:
+            self.document = document  # not composed yet, rendered on mount
+            return
+
+        if not document.startswith(self.document[: self._finished]):
+            self.query(".finished").remove()  # not an append, start over
+            self._finished = 0
+        self.document = document
+
+        boundary = find_block_boundary(document, self._finished)
+        if boundary > self._finished:
+            segment = Markdown(document[self._finished : boundary], classes="finished")
+            self.mount(segment, before=self._tail)
+            self._finished = boundary
+
+        self._tail.update(document[self._finished :])
@@ -1,10 +1,103 @@
-from textual.widgets import ListView
+from typing import Any, Callable
+
+from textual.widgets import ListItem, ListView
+
 from .conversation_option import StartNewConversationOption, ConversationOption
 
 
 class VimLikeListView(ListView):
+    """
+    ListView with j/k navigation that only mounts a window of its rows.
+
+    Rows are plain data turned into ListItems by `make_item`, the items passed
+    to the constructor stay pinned above them. When the cursor (or the mouse
+    wheel) runs past either edge of the window it slides by a page, so at most
+    `WINDOW_SIZE` row widgets exist no matter how many rows there are.
+    """
+
     BINDINGS = [("j", "cursor_down", "Cursor Down"), ("k", "cursor_up", "Cursor Up")]
 
+    PAGE_SIZE = 25
+    WINDOW_SIZE = 3 * PAGE_SIZE  # a page on screen plus a page of overscan each way
+
+    def __init__(self, *pinned: ListItem, make_item: Callable[[Any], ListItem]):
+        super().__init__(*pinned)
+        self._pinned = len(pinned)
+        self._make_item = make_item
+        self.rows: list[Any] = []
+        self.first_row = 0  # row shown in the first unpinned slot
+
+    @property
+    def _mounted_rows(self) -> int:
+        return len(self._nodes) - self._pinned
+
+    def set_rows(self, rows: list[Any]) -> None:
+        """Replace every row, top row first"""
+        for item in list(self._nodes[self._pinned :]):
+            item.remove()
+        self.rows = rows
+        self.first_row = 0
+        items = [self._make_item(row) for row in rows[: self.WINDOW_SIZE]]
+        if items:
+            self.mount(*items)
+
+    def insert_row(self, row: Any) -> None:
+        """Add a row at the top"""
+        self.rows.insert(0, row)
+        if self.first_row > 0:
+            self.first_row += 1  # the top isn't mounted, nothing to show yet
+            return
+
+        self.mount(self._make_item(row), before=self._pinned)
+        if self._mounted_rows > self.WINDOW_SIZE:
+            self._nodes[-1].remove()
+
+    def _page_down(self) -> None:
+        end = self.first_row + self._mounted_rows
+        items = [self._make_item(row) for row in self.rows[end : end + self.PAGE_SIZE]]
+        if not items:
+            return
+        self.mount(*items)
+
+        excess = max(self._mounted_rows - self.WINDOW_SIZE, 0)
+        for item in list(self._nodes[self._pinned : self._pinned + excess]):
+            item.remove()
+        self.first_row += excess
+        if self.index is not None and self.index >= self._pinned:
+            self.index = max(self.index - excess, self._pinned)
+
+    def _page_up(self) -> None:
+        start = max(self.first_row - self.PAGE_SIZE, 0)
+        items = [self._make_item(row) for row in self.rows[start : self.first_row]]
+        if not items:
+            return
+        self.mount(*items, before=self._pinned)
+        self.first_row = start
+
+        excess = max(self._mounted_rows - self.WINDOW_SIZE, 0)
+        for item in list(self._nodes[len(self._nodes) - excess :]):
+            item.remove()
+        if self.index is not None and self.index >= self._pinned:
+            self.index += len(items)
+
+    def action_cursor_down(self) -> None:
+        if self.index is not None and self.index >= len(self._nodes) - 1:
+            self._page_down()
+        super().action_cursor_down()
+
+    def action_cursor_up(self) -> None:
+        if self.index == self._pinned and self.first_row > 0:
+            self._page_up()
+        super().action_cursor_up()
+
+    def on_mouse_scroll_down(self, _) -> None:
+        if self.scroll_y >= self.max_scroll_y:
+            self._page_down()
+
+    def on_mouse_scroll_up(self, _) -> None:
+        if self.scroll_y <= 0:
+            self._page_up()
+
     def action_select_cursor(self) -> None:
         selected = self.highlighted_child
 
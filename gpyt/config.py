@@ -1,4 +1,6 @@
 SUMMARY_PROMPT = """Summarize the following question/statement in 5 words or less"""
+SUMMARY_PLACEHOLDER = "New Conversation"  # title until the summary arrives
+SUMMARIZER = "local"  # "local" keyword titles, or "llm" to ask the model
 
 
 API_ERROR_MESSAGE = """
@@ -51,8 +53,58 @@ For example, if the user is asking about football use this format
 --end intermediate to complex topics instructions--
 """
 
-APPROX_PROMPT_TOKEN_USAGE = 160
-
 PRICING_LOOKUP = {"gpt-3.5-turbo": (0.0015, 0.002), "gpt-4": (0.03, 0.06)}
 
 MODEL_MAX_CONTEXT = {"gpt-3.5-turbo": 4096, "gpt-4": 8096}
+
+TOKENIZER_ENCODING = "cl100k_base"  # gpt3.5/gpt4 encoding engine
+
+TOKENIZER_CACHE_SIZE = 4096  # number of memoized token counts
+
+CONTEXT_POLICY = "sliding"  # "full", "sliding" or "summary", see context.py
+
+CONTEXT_PIN_SYSTEM_PROMPT = True
+
+CONTEXT_RESPONSE_RESERVE = 1024  # tokens of MODEL_MAX_CONTEXT left for the reply
+
+HISTORY_SUMMARY_PROMPT = """Condense the following conversation into a short
+summary that keeps every fact, name, number and piece of code the user may
+refer back to. If a previous summary is given, merge it into the new one."""
+
+RENDER_FPS = 20  # max re-renders per second of a streaming response
+
+HISTORY_PAGE_TURNS = 10  # past turns rendered at a time when reopening a conversation
+HISTORY_LOAD_MARGIN = 5  # lines from the top that render the previous page
+
+# (tokens per minute, requests per minute) held to client-side, per model
+RATE_LIMITS = {"gpt-3.5-turbo": (90_000, 3_500), "gpt-4": (10_000, 200)}
+
+RETRY_ATTEMPTS = 5  # tries per request when rate limited (429) or on a 5xx
+RETRY_BASE_DELAY = 1.0  # seconds, doubled every retry (with full jitter)
+RETRY_MAX_DELAY = 30.0
+
+# `--auto` routes each request to one of these backends (name -> model)
+ROUTER_BACKENDS = {"gpt": "gpt-3.5-turbo", "gpt4": "gpt-4"}
+
+# checked in order before the cheapest/fastest pick, the first match wins;
+# e.g. {"backend": "gpt4", "keywords": ["proof", "refactor"]} or
+# {"backend": "gpt4", "min_tokens": 2000}. `--route-rules FILE` replaces these
+ROUTER_RULES: list[dict] = []
+
+# recent median seconds to first token past which a faster backend is preferred
+ROUTER_MAX_TTFT = 5.0
+ROUTER_LATENCY_WINDOW = 20  # recent requests per backend the median is over
+ROUTER_EXPECTED_OUTPUT = 500  # tokens of reply assumed when comparing prices
+
+HEDGE_AFTER = 2.0  # seconds without a first token before `--hedge` races a backup
+
+BATCH_CONCURRENCY = 4  # requests in flight at once for `--batch`
+
+HTTP_POOL_SIZE = 8  # connections kept open per API host
+HTTP_KEEPALIVE = 75  # seconds an idle connection is kept around for reuse
+
+METRICS_JSONL_MAX_BYTES = 5 * 1024 * 1024  # before metrics.jsonl is rotated
+METRICS_JSONL_BACKUPS = 3  # rotated metrics files kept
+
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024  # of cached responses kept on disk
+RESPONSE_CACHE_TTL = 7 * 24 * 60 * 60  # seconds before a cached response expires
@@ -0,0 +1,120 @@
+from typing import Callable, Sequence
+
+FULL = "full"
+SLIDING = "sliding"
+SUMMARY = "summary"
+
+POLICIES = (FULL, SLIDING, SUMMARY)
+
+
+class ContextWindow:
+    """
+    Chooses which part of the message history is sent with each request.
+
+    Policies:
+        full    -> send everything (the old behaviour)
+        sliding -> send the most recent messages that fit in `budget` tokens
+        summary -> like sliding, but messages that fall out of the window are
+                   folded into a running summary that is sent instead
+
+    The window only ever moves forward, and it works off token counts that are
+    handed to it once per message, so picking what to send costs
+    O(messages added or evicted) per turn rather than re-counting the history.
+    """
+
+    def __init__(
+        self,
+        *,
+        budget: int | None,
+        policy: str = SLIDING,
+        pin_system_prompt: bool = True,
+        summarize: Callable[[str, str], str] | None = None,
+        count_tokens: Callable[[str], int] = len,
+    ):
+        assert policy in POLICIES, f"Unknown context policy {policy!r}"
+        self.budget = budget
+        self.policy = policy if budget else FULL
+        self.pin_system_prompt = pin_system_prompt
+        self._summarize = summarize
+        self._count_tokens = count_tokens
+        self.reset(0)
+
+    def reset(self, system_tokens: int) -> None:
+        self.counts: list[int] = []  # tokens per message, system prompt excluded
+        self.start = 0  # index of the oldest message still in the window
+        self.window_tokens = 0
+        self.system_tokens = system_tokens
+        self.system_in_window = True
+        self.summary = ""
+        self.summary_tokens = 0
+        self._folded = 0  # messages before this index are in `summary`
+
+    @property
+    def tokens(self) -> int:
+        """Tokens that the next request will send"""
+        system = self.system_tokens if self.system_in_window else 0
+        return system + self.summary_tokens + self.window_tokens
+
+    @property
+    def folding(self) -> bool:
+        """Whether the next `select` has to summarize (a blocking request)"""
+        return (
+            self.policy == SUMMARY
+            and bool(self._summarize)
+            and self._folded < self.start
+        )
+
+    def append(self, tokens: int) -> None:
+        """Account for a message appended to the end of the history"""
+        self.counts.append(tokens)
+        self.window_tokens += tokens
+        self._trim()
+
+    def _trim(self) -> None:
+        if self.policy == FULL:
+            return
+
+        while self.tokens > self.budget:  # type: ignore
+            if self.system_in_window and not self.pin_system_prompt:
+                self.system_in_window = False
+                continue
+            if self.start >= len(self.counts) - 1:
+                break  # always send the latest message, even if it's too big
+            self.window_tokens -= self.counts[self.start]
+            self.start += 1
+
+    def select(self, messages: Sequence[dict[str, str]]) -> list[dict[str, str]]:
+        """
+        Return the messages to send, `messages[0]` being the system prompt.
+        `messages[1:]` must line up with what was `append`ed.
+        """
+        if self.policy == FULL:
+            return list(messages)
+
+        while self.policy == SUMMARY and self._folded < self.start:
+            self._fold(messages[1 + self._folded : 1 + self.start])
+
+        selected = [messages[0]] if self.system_in_window else []
+        if self.summary:
+            selected.append(
+                {
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation: {self.summary}",
+                }
+            )
+        selected.extend(messages[1 + self.start :])
+        return selected
+
+    def _fold(self, evicted: Sequence[dict[str, str]]) -> None:
+        self._folded = self.start
+        if not self._summarize:
+            return
+
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in evicted)
+        try:
+            self.summary = self._summarize(self.summary, transcript)
+        except:
+            return  # keep the previous summary, the turns are dropped either way
+
+        self.summary_tokens = self._count_tokens(self.summary)
+        self._trim()
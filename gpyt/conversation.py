@@ -1,13 +1,87 @@
+import sys
+from typing import Any, Iterator, Mapping
+
 from pydantic import BaseModel
 
 
-class Message(BaseModel):
-    id: str
-    role: str
-    content: str
+class Message:
+    """
+    One message of a conversation.
+
+    This is the only copy of a message kept in memory: the UI, the store and
+    every backend (see `history.ChatView`) read these records directly. They
+    are plain `__slots__` objects rather than pydantic models, so a long
+    history costs little more than its text.
+    """
+
+    __slots__ = ("id", "role", "content", "truncated")
+
+    def __init__(
+        self, *, id: str, role: str, content: str, truncated: bool = False
+    ) -> None:
+        self.id = id
+        self.role = sys.intern(role)  # a handful of distinct values
+        self.content = content
+        self.truncated = truncated  # the response was stopped before it finished
+
+    def dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "role": self.role,
+            "content": self.content,
+            "truncated": self.truncated,
+        }
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Message) and self.dict() == other.dict()
+
+    def __repr__(self) -> str:
+        return f"Message(id={self.id!r}, role={self.role!r}, content={self.content!r})"
+
+    @classmethod
+    def from_record(cls, record: Mapping[str, Any]) -> "Message":
+        """
+        A message from a stored record. Keys it doesn't know (written by a
+        newer version, or by hand) are ignored, as pydantic models do.
+        """
+        return cls(**{key: record[key] for key in cls.__slots__ if key in record})
+
+    # pydantic v1's custom type protocol, pyproject.toml pins pydantic ^1.10
+    # (v2 replaced it with `__get_pydantic_core_schema__`)
+    @classmethod
+    def __get_validators__(cls) -> Iterator:
+        yield cls._validate  # lets pydantic models hold (and parse) messages
+
+    @classmethod
+    def _validate(cls, value: Any) -> "Message":
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_record(value)
+        raise TypeError(f"Can't make a Message of {type(value).__name__}")
 
 
 class Conversation(BaseModel):
     id: str
     summary: str
     log: list[Message]
+
+
+class ConversationEntry(BaseModel):
+    """What the sidebar needs to know about a saved conversation"""
+
+    id: str
+    summary: str
+    mtime: float
+    messages: int
+
+    @classmethod
+    def from_conversation(
+        cls, conversation: Conversation, mtime: float
+    ) -> "ConversationEntry":
+        return cls(
+            id=conversation.id,
+            summary=conversation.summary,
+            mtime=mtime,
+            messages=len(conversation.log),
+        )
@@ -1,57 +1,61 @@
-from typing import Generator
+import asyncio
+from typing import AsyncIterator, Generator
 
 from gpt4free import you
-import tiktoken
 
 from .assistant import Assistant
-from .config import (
-    API_ERROR_FALLBACK,
-    APPROX_PROMPT_TOKEN_USAGE,
-)
+from .history import chat_pairs
 
 
 class FreeAssistant(Assistant):
+    API_ERROR_MESSAGE = """There was an ERROR with the free GPT 3.5 provider\n## Diagnostics\n* The provider may be down or rate-limiting, try again later\n* Or use the OpenAI API instead, with an OPENAI_API_KEY set at `~/.env`"""
+
+    error_message = API_ERROR_MESSAGE
+
     def __init__(self):
-        self.error_fallback_message = API_ERROR_FALLBACK
-        self.chat: list[dict[str, str]] = []
-        self._encoding_engine = tiktoken.get_encoding(
-            "cl100k_base"
-        )  # gpt3.5/gpt4 encoding engine
-        self.input_tokens_this_convo = APPROX_PROMPT_TOKEN_USAGE
-        self.output_tokens_this_convo = 10
-        self.prompt = ""
+        # no key, model or system prompt: the provider keeps no context limit
+        super().__init__(api_key="", model="", prompt="")
         self.summary_prompt = ""
-        self.model = ""
-        self.price_of_this_convo = self.get_default_price_of_prompt()
-
-    def set_history(self, history: list[dict[str, str]]) -> None:
-        self.clear_history()
-        for i in range(0, len(history) - 1, 2):
-            user = history[i]
-            assistant = history[i + 1]
-            self.chat.append(
-                {"question": user["content"], "answer": assistant["content"]}
-            )
-
-    def clear_history(self) -> None:
-        """reset internal message queue"""
-        self.chat.clear()
-
-    def get_response_stream(self, user_input: str) -> Generator:
+
+    def get_response_stream(
+        self, user_input: str, *, logged: bool = False
+    ) -> Generator:
         """Uses a free gpt3.5 provider, Theb. Lacks system prompt"""
+        self._log_request(user_input, logged)
+        self.ledger.charge_request()
         response = self.get_response(user_input)
         for i in range(0, len(response), 8):
-            yield response[i : i + 8]
+            delta = response[i : i + 8]
+            self.ledger.add_output_delta(delta)
+            yield delta
+
+    async def astream(
+        self, user_input: str, *, logged: bool = False
+    ) -> AsyncIterator[str]:
+        """`get_response_stream`, with the blocking gpt4free call in a thread"""
+        self._log_request(user_input, logged)
+        self.ledger.charge_request()
+        response = await asyncio.to_thread(self.get_response, user_input)
+        for i in range(0, len(response), 8):
+            delta = response[i : i + 8]
+            self.ledger.add_output_delta(delta)
+            yield delta
+
+    async def warm_up(self) -> None:
+        """Nothing to keep open, the SDK manages its own connections"""
 
-    def log_assistant_response(self, final_response: str) -> None:  # pyright: ignore
-        ...
+    async def aclose(self) -> None:
+        pass
 
     def get_response(self, user_input: str, memorize=True) -> str:
-        response = you.Completion.create(prompt=user_input, chat=self.chat).text
+        """
+        Ask with the answered questions of the history as context. The answer
+        is logged by `log_assistant_response`, `memorize` is kept for callers.
+        """
+        chat = chat_pairs(self.log) if memorize else []
+        response = you.Completion.create(prompt=user_input, chat=chat).text
         assert response, "None response for FreeAssistant `You`"
 
-        if memorize:
-            self.chat.append({"question": user_input, "answer": response})
         return response
 
     def get_conversation_summary(self, initial_message: str) -> str:
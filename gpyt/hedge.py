@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import Counter
+from typing import AsyncGenerator, AsyncIterator, Callable
+
+from .config import HEDGE_AFTER
+from .metrics import HedgeMetrics, Metrics
+
+PRIMARY = "primary"
+SECONDARY = "secondary"
+
+
+class Hedger:
+    """
+    Races a second backend against a slow first token.
+
+    The prompt goes to the selected (primary) backend first. If no token has
+    arrived after `after` seconds the `secondary` backend is started too,
+    whichever streams a token first is kept and the other is cancelled
+    (closing its connection). A racer that fails before its first token
+    simply loses, and a primary that fails early starts the secondary right
+    away. A stream that ends without any token is a finished (empty) answer,
+    not a failure. Every request is recorded, with the first token latency of
+    each racer, to tune `after` against the win rates.
+    """
+
+    def __init__(
+        self,
+        secondary: str,
+        *,
+        after: float = HEDGE_AFTER,
+        metrics: Metrics | None = None,
+    ):
+        self.secondary = secondary
+        self.after = after
+        self.metrics = metrics or Metrics()
+        # keyed by role, as both may well be the same backend
+        self.races: Counter[str] = Counter()  # role -> requests it ran in
+        self.wins: Counter[str] = Counter()  # role -> requests it answered
+
+    def win_rates(self) -> dict[str, float]:
+        """Share of the requests each role ran in that it answered"""
+        return {role: self.wins[role] / self.races[role] for role in self.races}
+
+    def stream(
+        self,
+        primary_name: str,
+        primary: AsyncIterator[str],
+        start_secondary: Callable[[], AsyncIterator[str]],
+    ) -> "HedgedStream":
+        """
+        The deltas of whichever of `primary` (from backend `primary_name`)
+        and, if it had to be started, `start_secondary()` produced a token
+        first, along with which one that was.
+        """
+        hedged = HedgedStream()
+        hedged._deltas = self._race(hedged, primary_name, primary, start_secondary)
+        return hedged
+
+    async def _race(
+        self,
+        hedged: "HedgedStream",
+        primary_name: str,
+        primary: AsyncIterator[str],
+        start_secondary: Callable[[], AsyncIterator[str]],
+    ) -> AsyncIterator[str]:
+        start = time.perf_counter()
+        first = asyncio.ensure_future(anext(primary))
+        racers = {first: (PRIMARY, primary)}
+        ttft: dict[str, float] = {}
+        winner = None
+        try:
+            await asyncio.wait({first}, timeout=self.after)
+            if not first.done() or not _answered(first):
+                secondary = start_secondary()
+                racers[asyncio.ensure_future(anext(secondary))] = (
+                    SECONDARY,
+                    secondary,
+                )
+
+            pending = set(racers)
+            while winner is None and pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in sorted(done, key=list(racers).index):  # primary first
+                    if not _answered(task):
+                        continue
+                    if task.exception() is None:
+                        ttft[racers[task][0]] = (time.perf_counter() - start) * 1000
+                    winner = winner or task
+        finally:
+            for task, (_, stream) in racers.items():
+                if task is not winner:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+                    await stream.aclose()
+
+        roles = [role for role, _ in racers.values()]
+        hedged.winner = racers[winner][0] if winner else None
+        self._record(primary_name, roles, hedged.winner, ttft)
+        if winner is None:  # both failed, surface the primary's error
+            raise first.exception()  # type: ignore
+        if winner.exception() is not None:
+            return  # an empty, but complete, answer
+
+        stream = racers[winner][1]
+        try:
+            yield winner.result()
+            async for delta in stream:
+                yield delta
+        finally:
+            await stream.aclose()
+
+    def _record(
+        self, primary: str, roles: list[str], won: str | None, ttft: dict[str, float]
+    ) -> None:
+        for role in roles:
+            self.races[role] += 1
+        if won:
+            self.wins[won] += 1
+
+        self.metrics.record(
+            HedgeMetrics(
+                time=time.time(),
+                primary=primary,
+                secondary=self.secondary,
+                hedged=SECONDARY in roles,
+                winner=won,
+                after_ms=self.after * 1000,
+                primary_ttft_ms=ttft.get(PRIMARY),
+                secondary_ttft_ms=ttft.get(SECONDARY),
+            )
+        )
+
+
+class HedgedStream:
+    """
+    The deltas of a hedged request. `winner` is the role (PRIMARY or
+    SECONDARY) of the racer they come from, None until one has won, and
+    after both failed.
+    """
+
+    def __init__(self):
+        self.winner: str | None = None
+        self._deltas: AsyncGenerator[str, None]
+
+    def __aiter__(self) -> "HedgedStream":
+        return self
+
+    async def __anext__(self) -> str:
+        return await anext(self._deltas)
+
+    async def aclose(self) -> None:
+        await self._deltas.aclose()
+
+
+def _answered(task: asyncio.Future) -> bool:
+    """Whether a racer's first `anext` gave a token, or ended its stream"""
+    return task.exception() is None or isinstance(task.exception(), StopAsyncIteration)
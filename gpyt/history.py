@@ -0,0 +1,53 @@
+from typing import Iterator, Sequence, overload
+
+from .conversation import Message
+
+
+class ChatView(Sequence[dict[str, str]]):
+    """
+    A conversation's log as the chat API sees it: the system prompt followed
+    by `{"role", "content"}` dicts, built when they're read rather than kept
+    alongside the log. Slices come back as lists, ready to send.
+    """
+
+    __slots__ = ("system", "log")
+
+    def __init__(self, system: dict[str, str], log: list[Message]):
+        self.system = system
+        self.log = log
+
+    def __len__(self) -> int:
+        return len(self.log) + 1
+
+    @overload
+    def __getitem__(self, index: int) -> dict[str, str]: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[dict[str, str]]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index == 0:
+            return self.system
+        if not 0 < index < len(self):
+            raise IndexError(index)
+
+        message = self.log[index - 1]
+        return {"role": message.role, "content": message.content}
+
+    def __iter__(self) -> Iterator[dict[str, str]]:
+        yield self.system
+        for message in self.log:
+            yield {"role": message.role, "content": message.content}
+
+
+def chat_pairs(log: list[Message]) -> list[dict[str, str]]:
+    """The answered questions of `log` as `{"question", "answer"}` pairs"""
+    return [
+        {"question": question.content, "answer": answer.content}
+        for question, answer in zip(log, log[1:])
+        if question.role == "user" and answer.role == "assistant"
+    ]
@@ -1,22 +1,49 @@
 import secrets
-import string
+import time
 import os
 from pathlib import Path
+from threading import Lock
 
+TIME_DIGITS = 12  # 48 bits of milliseconds since the epoch, enough until 10889
+RANDOM_BITS = 80
+RANDOM_DIGITS = RANDOM_BITS // 4
 
-_ALPHABET = string.hexdigits
+HEX_DIGITS = frozenset("0123456789abcdef")
 
+_lock = Lock()
+_last_time = 0
+_last_random = 0
 
-def get_id(length=16) -> str:
-    _id = "".join([secrets.choice(_ALPHABET) for _ in range(length)])
-    if _id in get_id.seen:
-        return get_id(length)
-    return _id
 
+def get_id() -> str:
+    """
+    A new id, ULID-style: the creation time in milliseconds followed by 80
+    random bits, as 32 lowercase hex digits. Ids sort by creation time, as
+    plain strings too. Within the same millisecond the random part is
+    incremented rather than redrawn, so the ids of one process are strictly
+    increasing and never collide with each other.
+    """
+    global _last_time, _last_random
+
+    with _lock:
+        now = time.time_ns() // 1_000_000
+        if now <= _last_time:  # same millisecond (or the clock went back)
+            now, random = _last_time, _last_random + 1
+            if random >> RANDOM_BITS:
+                now, random = now + 1, secrets.randbits(RANDOM_BITS)
+        else:
+            random = secrets.randbits(RANDOM_BITS)
+        _last_time, _last_random = now, random
+
+    return f"{now:0{TIME_DIGITS}x}{random:0{RANDOM_DIGITS}x}"
+
+
+def id_time(id: str) -> float | None:
+    """When `id` was made (unix seconds), None for ids older than `get_id`'s"""
+    if len(id) != TIME_DIGITS + RANDOM_DIGITS or not HEX_DIGITS.issuperset(id):
+        return None
+    return int(id[:TIME_DIGITS], 16) / 1000
 
-# TODO: load previous convo and message ids to ensure no overlap (pretty unlikely though lol)
-# TODO: or use id's generated by the API's themselves
-get_id.seen = set()
 
 if __name__ == "__main__":
     HOME_DIR = os.getenv("HOME")
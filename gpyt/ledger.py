@@ -0,0 +1,115 @@
+from threading import Lock
+
+from .config import PRICING_LOOKUP
+from .tokenizer import Tokenizer, get_tokenizer
+
+
+class Spend:
+    """
+    Tokens and price of one conversation, summed over every backend that
+    answered in it. Ledgers attached to the conversation charge it too, and
+    outlive their own resets.
+    """
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.price = 0.0
+        self._lock = Lock()  # backends charge from worker threads too
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, input_tokens: int, output_tokens: int, price: float) -> None:
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.price += price
+
+
+class TokenLedger:
+    """
+    Token usage and price of a single conversation.
+
+    Every message is counted exactly once when it is recorded, streamed output
+    is billed chunk by chunk as it arrives (and counted whole into the history
+    once it is done), and totals/price are kept as running sums so each
+    update is O(1) no matter how long the conversation gets.
+
+    Billing follows the chat API: every request pays for the whole prompt it
+    sends (system prompt + history) as input, plus whatever it generates as
+    output.
+    """
+
+    def __init__(self, model: str, tokenizer: Tokenizer | None = None):
+        self.model = model
+        self._tokenizer = tokenizer or get_tokenizer()
+        in_price, out_price = PRICING_LOOKUP.get(model, (0.0, 0.0))
+        self._in_price_per_token = in_price / 1000
+        self._out_price_per_token = out_price / 1000
+        self._lock = Lock()  # summaries are billed from a worker thread
+        self.spend: Spend | None = None  # the attached conversation's, if any
+        self.reset()
+
+    def reset(self, prompt: str = "") -> None:
+        """Start over with only `prompt` (the system message) in context"""
+        self.forget(prompt)
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.price = 0.0
+        self.replaying = False  # output comes from the response cache, unbilled
+
+    def forget(self, prompt: str = "") -> None:
+        """Drop the history from the context, keeping what was billed so far"""
+        self.entries: list[tuple[str, int]] = []  # (role, tokens) per message
+        self.context_tokens = self._tokenizer.count(prompt)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def record_message(self, role: str, content: str) -> int:
+        """Count a message into the conversation history, return its tokens"""
+        tokens = self._tokenizer.count(content)
+        self.entries.append((role, tokens))
+        self.context_tokens += tokens
+        return tokens
+
+    def charge(self, input_tokens: int, output_tokens: int = 0) -> None:
+        price = (
+            input_tokens * self._in_price_per_token
+            + output_tokens * self._out_price_per_token
+        )
+        with self._lock:
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self.price += price
+        if self.spend is not None:
+            self.spend.add(input_tokens, output_tokens, price)
+
+    def charge_request(self) -> None:
+        """Bill a request that sends the current history as its prompt"""
+        self.charge(self.context_tokens)
+
+    def add_output_delta(self, delta: str) -> int:
+        """
+        Bill one streamed chunk of output as soon as it arrives. Chunks are
+        encoded directly: they are never seen twice, and memoizing thousands
+        of them per response would evict the message counts from the cache.
+        """
+        tokens = len(self._tokenizer.encode(delta)) if delta else 0
+        if not self.replaying:
+            self.charge(0, tokens)
+        return tokens
+
+    def finish_output(self, content: str) -> int:
+        """
+        Record a streamed response as an assistant message in the history.
+        Its tokens were already billed chunk by chunk, by whichever backend
+        streamed it.
+        """
+        tokens = self._tokenizer.count(content)
+        self.entries.append(("assistant", tokens))
+        self.context_tokens += tokens
+        return tokens
@@ -0,0 +1,268 @@
+import cProfile
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from threading import Lock
+from typing import Iterator
+
+from pydantic import BaseModel
+
+from .config import METRICS_JSONL_BACKUPS, METRICS_JSONL_MAX_BYTES
+
+JSONL = "jsonl"
+PROMETHEUS = "prometheus"
+EXPORTERS = [JSONL, PROMETHEUS]
+
+
+class ResponseMetrics(BaseModel):
+    """Where the time of one streamed response went"""
+
+    kind: str = "response"
+    time: float  # unix time the request was made
+    model: str
+    conversation_id: str
+    ttft_ms: float | None = None  # None when no token ever arrived
+    duration_ms: float = 0.0
+    output_tokens: int = 0
+    tokens_per_second: float | None = None  # after the first token
+    renders: int = 0
+    render_ms_total: float = 0.0
+    render_ms_max: float = 0.0
+    save_ms: float = 0.0
+    truncated: bool = False
+    failed: bool = False
+    cached: bool = False  # answered from the response cache (`--cache`)
+
+
+class SummaryMetrics(BaseModel):
+    """How long titling a new conversation took"""
+
+    kind: str = "summary"
+    time: float
+    summarizer: str
+    summary_ms: float
+
+
+class HedgeMetrics(BaseModel):
+    """Who won one hedged request, and how fast each racer was"""
+
+    kind: str = "hedge"
+    time: float
+    primary: str  # backend names
+    secondary: str
+    hedged: bool  # whether the secondary had to be started
+    winner: str | None  # "primary", "secondary", or None if both failed
+    after_ms: float
+    primary_ttft_ms: float | None = None  # None if it lost (or failed)
+    secondary_ttft_ms: float | None = None
+
+
+Record = ResponseMetrics | SummaryMetrics | HedgeMetrics
+
+
+class Exporter(ABC):
+    """Where metric records go"""
+
+    @abstractmethod
+    def export(self, record: Record) -> None:
+        """Write `record` out (or fold it into what was written)"""
+
+
+class JSONLExporter(Exporter):
+    """One JSON object per record, rotated to `.1`, `.2`, ... once too large"""
+
+    FILENAME = "metrics.jsonl"
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_bytes: int = METRICS_JSONL_MAX_BYTES,
+        backups: int = METRICS_JSONL_BACKUPS,
+    ):
+        self.path = Path(path, self.FILENAME)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(
+            self.path, maxBytes=max_bytes, backupCount=backups, delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger = logging.getLogger(f"{__name__}.{id(self)}")
+        self._logger.propagate = False
+        self._logger.setLevel(logging.INFO)
+        self._logger.addHandler(handler)
+
+    def export(self, record: Record) -> None:
+        self._logger.info(json.dumps(record.dict()))
+
+
+class PrometheusExporter(Exporter):
+    """
+    Running totals in the Prometheus text format, for node_exporter's
+    textfile collector. The file is rewritten (atomically) after every record.
+    """
+
+    FILENAME = "gpyt.prom"
+
+    # metric -> (type, description)
+    METRICS = {
+        "gpyt_responses_total": ("counter", "Responses streamed"),
+        "gpyt_responses_failed_total": ("counter", "Responses that errored"),
+        "gpyt_responses_truncated_total": ("counter", "Responses stopped early"),
+        "gpyt_responses_cached_total": ("counter", "Responses the cache answered"),
+        "gpyt_output_tokens_total": ("counter", "Tokens streamed in"),
+        "gpyt_ttft_seconds": ("summary", "Time to first token"),
+        "gpyt_response_seconds": ("summary", "Time to the last token"),
+        "gpyt_render_seconds": ("summary", "Time spent rendering one update"),
+        "gpyt_save_seconds": ("summary", "Time spent saving a response"),
+        "gpyt_summary_seconds": ("summary", "Time spent titling a conversation"),
+        "gpyt_hedge_races_total": ("counter", "Requests a hedge role ran in"),
+        "gpyt_hedge_wins_total": ("counter", "Requests a hedge role answered"),
+        "gpyt_hedge_ttft_seconds": ("summary", "Time to first token of a winner"),
+    }
+
+    def __init__(self, path: Path):
+        self.path = Path(path, self.FILENAME)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # (metric, labels) -> value, summaries keep [sum, count]
+        self._values: dict[tuple[str, str], float | list[float]] = {}
+
+    def _inc(self, metric: str, labels: str, amount: float = 1) -> None:
+        key = (metric, labels)
+        self._values[key] = self._values.get(key, 0) + amount  # type: ignore
+
+    def _observe(self, metric: str, labels: str, total: float, count: int = 1) -> None:
+        summary = self._values.setdefault((metric, labels), [0.0, 0])
+        summary[0] += total  # type: ignore
+        summary[1] += count  # type: ignore
+
+    def export(self, record: Record) -> None:
+        if isinstance(record, SummaryMetrics):
+            labels = f'summarizer="{record.summarizer}"'
+            self._observe("gpyt_summary_seconds", labels, record.summary_ms / 1000)
+        elif isinstance(record, HedgeMetrics):
+            roles = {"primary": record.primary, "secondary": record.secondary}
+            for role, ttft in [
+                ("primary", record.primary_ttft_ms),
+                ("secondary", record.secondary_ttft_ms),
+            ]:
+                labels = f'role="{role}",backend="{roles[role]}"'
+                if role == "primary" or record.hedged:
+                    self._inc("gpyt_hedge_races_total", labels)
+                self._inc("gpyt_hedge_wins_total", labels, record.winner == role)
+                if ttft is not None and record.winner == role:
+                    self._observe("gpyt_hedge_ttft_seconds", labels, ttft / 1000)
+        else:
+            model = f'model="{record.model}"'
+            self._inc("gpyt_responses_total", model)
+            self._inc("gpyt_responses_failed_total", model, record.failed)
+            self._inc("gpyt_responses_truncated_total", model, record.truncated)
+            self._inc("gpyt_responses_cached_total", model, record.cached)
+            self._inc("gpyt_output_tokens_total", model, record.output_tokens)
+            if record.ttft_ms is not None:
+                self._observe("gpyt_ttft_seconds", model, record.ttft_ms / 1000)
+            self._observe("gpyt_response_seconds", model, record.duration_ms / 1000)
+            self._observe(
+                "gpyt_render_seconds",
+                model,
+                record.render_ms_total / 1000,
+                record.renders,
+            )
+            self._observe("gpyt_save_seconds", model, record.save_ms / 1000)
+
+        self._write()
+
+    def render(self) -> str:
+        lines = []
+        for metric, (kind, description) in self.METRICS.items():
+            values = [
+                (labels, value)
+                for (name, labels), value in sorted(self._values.items())
+                if name == metric
+            ]
+            if not values:
+                continue
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for labels, value in values:
+                if isinstance(value, list):
+                    lines.append(f"{metric}_sum{{{labels}}} {value[0]}")
+                    lines.append(f"{metric}_count{{{labels}}} {value[1]}")
+                else:
+                    lines.append(f"{metric}{{{labels}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def _write(self) -> None:
+        tmp = self.path.with_suffix(".prom.tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, self.path)  # scrapers never see a half written file
+
+
+class Metrics:
+    """
+    Collects request lifecycle timings and hands them to an exporter. With no
+    exporter records are dropped, so instrumented code never needs to check.
+
+    `profile_path` turns on the profiling hook: every `profile()` block is run
+    under cProfile and its stats dumped there, one `.prof` file per block,
+    for `python -m pstats` or snakeviz.
+    """
+
+    def __init__(
+        self, exporter: Exporter | None = None, profile_path: Path | None = None
+    ):
+        self.exporter = exporter
+        self.profile_path = profile_path
+        self._lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def record(self, record: Record) -> None:
+        if self.exporter is None:
+            return
+
+        with self._lock:  # summaries are recorded from worker threads
+            try:
+                self.exporter.export(record)
+            except OSError:
+                pass  # metrics never take the app down
+
+    @contextmanager
+    def profile(self, name: str) -> Iterator[None]:
+        if self.profile_path is None:
+            yield
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # an overlapping block is already being profiled
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self.profile_path.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(self.profile_path / f"{name}-{time.time_ns()}.prof")
+
+
+def make_metrics(export: str | None, profile: bool, path: Path) -> Metrics:
+    """Metrics exported in the `export` format (or not at all) under `path`"""
+    exporter: Exporter | None = None
+    if export == JSONL:
+        exporter = JSONLExporter(path)
+    elif export == PROMETHEUS:
+        exporter = PrometheusExporter(path)
+    else:
+        assert export is None, f"Unknown metrics exporter {export!r}"
+
+    return Metrics(exporter, path / "profiles" if profile else None)
@@ -1,15 +1,10 @@
-from typing import Generator
+import asyncio
+from typing import AsyncIterator, Generator
 
 import google.generativeai as palm
-import tiktoken
 
 from .assistant import Assistant
-from .config import API_ERROR_FALLBACK, PROMPT
-
-from .config import (
-    API_ERROR_FALLBACK,
-    APPROX_PROMPT_TOKEN_USAGE,
-)
+from .config import PROMPT
 
 
 class PalmAssistant(Assistant):
@@ -35,48 +30,50 @@ class PalmAssistant(Assistant):
 
     API_ERROR_MESSAGE = """There was an ERROR with the PaLM 2 API\n## Diagnostics\n* Make sure you have a PALM_API_KEY set at `~/.env`\n* Make sure you aren't being rate-limited."""
 
+    error_message = API_ERROR_MESSAGE
+
     def __init__(self, api_key):
-        self.error_fallback_message = API_ERROR_FALLBACK
-        self.chat: list[dict[str, str]] = []
-        self.api_key = api_key
+        # no model or system prompt of ours, and no context limit: PaLM trims
+        super().__init__(api_key=api_key, model="", prompt="")
         if not self._bad_key():
             palm.configure(api_key=self.api_key)
-        self.messages = []
         self.error_fallback_message = PalmAssistant.API_ERROR_MESSAGE
-        self.input_tokens_this_convo = APPROX_PROMPT_TOKEN_USAGE
-        self.output_tokens_this_convo = 10
-        self.model, self.prompt, self.summary_prompt = ("", "", "")
-
-        self._encoding_engine = tiktoken.get_encoding(
-            "cl100k_base"
-        )  # gpt3.5/gpt4 encoding engine
-        self.price_of_this_convo = self.get_default_price_of_prompt()
-
-    def set_history(self, new_history: list[dict[str, str]]):
-        self.clear_history()
-        for message in new_history:
-            self.messages.append(message["content"])
+        self.summary_prompt = ""
 
-    def clear_history(self) -> None:
-        """reset internal message queue"""
-        self.messages.clear()
-
-    def get_response_stream(self, user_input: str) -> Generator:
+    def get_response_stream(
+        self, user_input: str, *, logged: bool = False
+    ) -> Generator:
         """Fake a stream output with PaLM 2"""
-        response = self.get_response(user_input)
+        response = self.get_response(user_input, logged)
+        for i in range(0, len(response), 8):
+            delta = response[i : i + 8]
+            self.ledger.add_output_delta(delta)
+            yield delta
+
+    async def astream(
+        self, user_input: str, *, logged: bool = False
+    ) -> AsyncIterator[str]:
+        """Fake a stream output with PaLM 2, without blocking the event loop"""
+        response = await asyncio.to_thread(self.get_response, user_input, logged)
         for i in range(0, len(response), 8):
-            yield response[i : i + 8]
+            delta = response[i : i + 8]
+            self.ledger.add_output_delta(delta)
+            yield delta
+
+    async def warm_up(self) -> None:
+        """Nothing to keep open, the SDK manages its own connections"""
 
-    def log_assistant_response(self, final_response: str) -> None:  # pyright: ignore
-        ...
+    async def aclose(self) -> None:
+        pass
 
-    def get_response(self, user_input: str) -> str:
+    def get_response(self, user_input: str, logged: bool = False) -> str:
+        """Log `user_input` and ask, the answer is logged by `log_assistant_response`"""
+        self._log_request(user_input, logged)
+        self.ledger.charge_request()
         if self._bad_key():
             return PalmAssistant.API_ERROR_MESSAGE
-        self.messages.append(user_input)
-        response = palm.chat(context=PROMPT, messages=self.messages).last
-        self.messages.append(response)
-        return response
+        messages = [message.content for message in self.log]
+        return palm.chat(context=PROMPT, messages=messages).last
 
     def _bad_key(self) -> bool:
         return not self.api_key or (type(self.api_key) is str and len(self.api_key) < 1)
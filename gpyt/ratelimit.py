@@ -0,0 +1,148 @@
+import asyncio
+import random
+import time
+from threading import Lock
+from typing import Awaitable, Callable, TypeVar
+
+from .config import (
+    RATE_LIMITS,
+    RETRY_ATTEMPTS,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute` units a minute, holding at most a minute's worth.
+
+    Callers reserve what they need up front and are told how long to wait for
+    it; the balance may go negative, which queues later callers behind earlier
+    ones instead of letting them starve.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.available = per_minute
+        self.updated = time.monotonic()
+        self._lock = Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        self.available = min(self.capacity, self.available + elapsed * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount`, return the seconds to wait until it is covered"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.available -= min(amount, self.capacity)
+            return max(-self.available / self.rate, 0.0)
+
+    def consume(self, amount: float) -> None:
+        """Account for usage after the fact, without waiting for it"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.available -= amount
+
+
+class RateLimiter:
+    """
+    Keeps one model's requests under its tokens-per-minute and
+    requests-per-minute budgets, by holding them client-side rather than
+    finding out from a 429. A budget of None is unlimited.
+    """
+
+    def __init__(self, tpm: float | None, rpm: float | None):
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.requests = TokenBucket(rpm) if rpm else None
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self.tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if self.requests:
+            delay = max(delay, self.requests.reserve(1))
+        return delay
+
+    def wait(self, tokens: int) -> None:
+        """Block until a request estimated at `tokens` fits the budgets"""
+        delay = self._reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self, tokens: int) -> None:
+        """`wait`, without blocking the event loop"""
+        delay = self._reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def consume(self, tokens: int) -> None:
+        """Charge tokens that weren't known up front (the response)"""
+        if self.tokens:
+            self.tokens.consume(tokens)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """The limiter shared by every assistant that talks to `model`"""
+    with _limiters_lock:
+        if model not in _limiters:
+            tpm, rpm = RATE_LIMITS.get(model, (None, None))
+            _limiters[model] = RateLimiter(tpm, rpm)
+
+        return _limiters[model]
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limited (429) or a server side failure (5xx)"""
+    status = getattr(error, "http_status", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def backoff(attempt: int, error: Exception | None = None) -> float:
+    """
+    Seconds to wait before retry number `attempt` (from 0): exponential with
+    full jitter, but never less than what the server asked for.
+    """
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+    headers = getattr(error, "headers", None) or {}
+    try:
+        retry_after = headers.get("retry-after") or headers.get("Retry-After")
+        delay = max(delay, float(retry_after or 0))
+    except (TypeError, ValueError):
+        pass
+
+    return delay
+
+
+def retry(call: Callable[[], T], attempts: int = RETRY_ATTEMPTS) -> T:
+    """Run `call`, retrying rate limits and server errors"""
+    for attempt in range(attempts):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            time.sleep(backoff(attempt, e))
+
+    raise AssertionError("unreachable")
+
+
+async def aretry(call: Callable[[], Awaitable[T]], attempts: int = RETRY_ATTEMPTS) -> T:
+    """`retry`, for coroutines"""
+    for attempt in range(attempts):
+        try:
+            return await call()
+        except Exception as e:
+            if attempt == attempts - 1 or not is_retryable(e):
+                raise
+            await asyncio.sleep(backoff(attempt, e))
+
+    raise AssertionError("unreachable")
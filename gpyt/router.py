@@ -0,0 +1,151 @@
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, Iterable
+
+from pydantic import BaseModel
+
+from .config import (
+    CONTEXT_RESPONSE_RESERVE,
+    MODEL_MAX_CONTEXT,
+    PRICING_LOOKUP,
+    ROUTER_BACKENDS,
+    ROUTER_EXPECTED_OUTPUT,
+    ROUTER_LATENCY_WINDOW,
+    ROUTER_MAX_TTFT,
+    ROUTER_RULES,
+)
+from .tokenizer import Tokenizer, get_tokenizer
+
+MESSAGE_OVERHEAD = 4  # tokens the chat format adds around every message
+
+
+class Rule(BaseModel):
+    """
+    Send a request to `backend` when it has between `min_tokens` and
+    `max_tokens` tokens (prompt and history included) and, if `keywords` are
+    given, the question mentions one of them (case insensitive).
+    """
+
+    backend: str
+    min_tokens: int = 0
+    max_tokens: int | None = None
+    keywords: list[str] = []
+
+    def matches(self, tokens: int, text: str) -> bool:
+        if tokens < self.min_tokens:
+            return False
+        if self.max_tokens is not None and tokens > self.max_tokens:
+            return False
+        if self.keywords:
+            text = text.lower()
+            return any(keyword.lower() in text for keyword in self.keywords)
+
+        return True
+
+
+def load_rules(path: Path | None) -> list[Rule]:
+    """Rules from a JSON list in `path`, or the ones in config.py"""
+    rules = ROUTER_RULES
+    if path is not None:
+        with open(path, "r") as fd:
+            rules = json.load(fd)
+
+    return [Rule(**rule) for rule in rules]
+
+
+class Router:
+    """
+    Picks a backend for every request.
+
+    Backends whose model can't take the whole prompt (history included, plus
+    room for the reply) are ruled out first, then the first matching rule
+    wins. Without one, the cheapest backend whose recent time to first token
+    is within `max_ttft` is picked, or the quickest when they're all slow.
+    When nothing fits, the backend with the largest context gets it and its
+    context policy trims the history.
+    """
+
+    def __init__(
+        self,
+        backends: dict[str, str] = ROUTER_BACKENDS,
+        rules: Iterable[Rule] = (),
+        *,
+        max_ttft: float = ROUTER_MAX_TTFT,
+        expected_output: int = ROUTER_EXPECTED_OUTPUT,
+        tokenizer: Tokenizer | None = None,
+    ):
+        self.backends = backends  # backend name -> model
+        self.rules = list(rules)
+        self.max_ttft = max_ttft
+        self.expected_output = expected_output
+        self._tokenizer = tokenizer or get_tokenizer()
+        self._ttft: dict[str, deque[float]] = {
+            name: deque(maxlen=ROUTER_LATENCY_WINDOW) for name in backends
+        }
+
+    def estimate(self, texts: Iterable[str]) -> int:
+        """Prompt tokens of a request sending `texts` as its messages"""
+        count = self._tokenizer.count  # memoized, past messages are free
+        return sum(count(text) + MESSAGE_OVERHEAD for text in texts)
+
+    def context(self, name: str) -> int | None:
+        return MODEL_MAX_CONTEXT.get(self.backends[name], None)
+
+    def fits(self, name: str, tokens: int) -> bool:
+        context = self.context(name)
+        return context is None or tokens + CONTEXT_RESPONSE_RESERVE <= context
+
+    def cost(self, name: str, tokens: int) -> float:
+        """Estimated price of the request on backend `name`"""
+        in_price, out_price = PRICING_LOOKUP.get(self.backends[name], (0.0, 0.0))
+        return (tokens * in_price + self.expected_output * out_price) / 1000
+
+    def latency(self, name: str) -> float | None:
+        """Median time to first token of the last few requests, in seconds"""
+        samples = self._ttft.get(name, None)
+        return statistics.median(samples) if samples else None
+
+    def observe(self, name: str, ttft: float) -> None:
+        if name in self._ttft:
+            self._ttft[name].append(ttft)
+
+    async def timed(self, name: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Pass `stream` through, observing its time to first token"""
+        start = time.perf_counter()
+        first = True
+        try:
+            async for delta in stream:
+                if first:
+                    self.observe(name, time.perf_counter() - start)
+                    first = False
+                yield delta
+        except asyncio.CancelledError:
+            if first:  # given up on (by a hedge, or the user): at least this slow
+                self.observe(name, time.perf_counter() - start)
+            raise
+        finally:
+            await stream.aclose()  # type: ignore
+
+    def route(self, tokens: int, text: str) -> str:
+        """The backend for a request of `tokens` prompt tokens asking `text`"""
+        fitting = [name for name in self.backends if self.fits(name, tokens)]
+        if not fitting:
+            return max(self.backends, key=lambda name: self.context(name) or 0)
+
+        for rule in self.rules:
+            if rule.backend in fitting and rule.matches(tokens, text):
+                return rule.backend
+
+        fast = [
+            name
+            for name in fitting
+            if (latency := self.latency(name)) is None or latency <= self.max_ttft
+        ]
+        if fast:
+            return min(fast, key=lambda name: self.cost(name, tokens))
+
+        return min(fitting, key=lambda name: self.latency(name))  # type: ignore
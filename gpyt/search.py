@@ -0,0 +1,174 @@
+import re
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
+
+from pydantic import BaseModel
+
+from .conversation import Conversation, Message
+
+
+class SearchHit(BaseModel):
+    conversation_id: str
+    message_id: str
+    role: str
+    snippet: str
+    score: float
+
+
+class SearchIndex:
+    """
+    On-disk full-text index over the content of every saved message.
+
+    Backed by an SQLite FTS5 table, so lookups are served from the inverted
+    index on disk (ranked with bm25) without loading any conversation. The
+    store feeds it the new messages of every save; an index that was never
+    built is built once from the saved conversations on the first search.
+    Saves made while it's being built are queued and indexed right after, so
+    they neither wait for the build nor go missing from it.
+    """
+
+    FILENAME = "search.db"
+
+    def __init__(self, path: Path):
+        self.path = Path(path, self.FILENAME)
+        self._db: sqlite3.Connection | None = None
+        self._lock = Lock()
+        self._built = False
+        # (conversation id, messages) saved during a `build`, None outside one
+        self._queued: list[tuple[str, list[Message]]] | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+                    content,
+                    conversation_id UNINDEXED,
+                    message_id UNINDEXED,
+                    role UNINDEXED
+                );
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                """)
+
+        return self._db
+
+    @property
+    def is_built(self) -> bool:
+        if self._built or not self.path.exists():
+            return self._built
+
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT value FROM meta WHERE key = 'built'")
+                .fetchone()
+            )
+        self._built = row is not None
+        return self._built
+
+    def add(self, conversation_id: str, messages: Iterable[Message]) -> None:
+        """Index newly saved messages, a no-op until the index has been built"""
+        with self._lock:
+            if self._queued is not None:  # being built, don't wait for it
+                self._queued.append((conversation_id, list(messages)))
+                return
+
+        if not self.is_built:
+            return
+
+        with self._lock, self._connect() as db:
+            self._insert(db, conversation_id, messages)
+
+    def _insert(
+        self, db: sqlite3.Connection, conversation_id: str, messages: Iterable[Message]
+    ) -> None:
+        db.executemany(
+            "INSERT INTO messages (content, conversation_id, message_id, role)"
+            " VALUES (?, ?, ?, ?)",
+            ((m.content, conversation_id, m.id, m.role) for m in messages),
+        )
+
+    def build(self, conversations: Iterable[Conversation]) -> None:
+        """
+        (Re)index every conversation from scratch. `conversations` is read
+        (from disk, likely) without holding the lock, saves in the meantime
+        are queued by `add` and indexed at the end.
+        """
+        with self._lock:
+            self._queued = []
+            db = self._connect()
+            db.execute("DELETE FROM messages")
+
+        try:
+            for conversation in conversations:
+                with self._lock:
+                    self._insert(db, conversation.id, conversation.log)
+        except BaseException:
+            with self._lock:
+                db.rollback()
+                self._queued = None
+            raise
+
+        with self._lock, db:
+            for conversation_id, messages in self._queued:
+                # the build may have read them from disk already
+                indexed = {
+                    message_id
+                    for (message_id,) in db.execute(
+                        "SELECT message_id FROM messages WHERE conversation_id = ?",
+                        (conversation_id,),
+                    )
+                }
+                self._insert(
+                    db, conversation_id, (m for m in messages if m.id not in indexed)
+                )
+            db.execute("INSERT OR REPLACE INTO meta VALUES ('built', '1')")
+            self._queued = None
+        self._built = True
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Best matching messages first"""
+        match = self._to_match_expression(query)
+        if not match:
+            return []
+
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT conversation_id, message_id, role,"
+                    " snippet(messages, 0, '[', ']', '...', 12), bm25(messages)"
+                    " FROM messages WHERE messages MATCH ?"
+                    " ORDER BY bm25(messages) LIMIT ?",
+                    (match, limit),
+                )
+                .fetchall()
+            )
+
+        return [
+            SearchHit(
+                conversation_id=conversation_id,
+                message_id=message_id,
+                role=role,
+                snippet=snippet,
+                score=-score,  # bm25() is lower-is-better
+            )
+            for conversation_id, message_id, role, snippet, score in rows
+        ]
+
+    @staticmethod
+    def _to_match_expression(query: str) -> str:
+        """
+        Turn free text into an FTS5 query: every word must match, the last one
+        as a prefix so results show up while the user is still typing.
+        """
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return ""
+
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += "*"
+        return " ".join(quoted)
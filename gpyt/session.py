@@ -0,0 +1,138 @@
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Iterator
+
+import aiohttp
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import HTTP_KEEPALIVE, HTTP_POOL_SIZE
+
+_requests_session: requests.Session | None = None
+_requests_lock = Lock()
+# the responses of the pooled session's requests made inside `HTTPSession.use`
+_responses: ContextVar[list[aiohttp.ClientResponse] | None] = ContextVar(
+    "_responses", default=None
+)
+
+
+def get_requests_session() -> requests.Session:
+    """
+    Pooled keep-alive session for the SDK's blocking calls, shared by every
+    thread (the SDK would otherwise open one session per worker thread).
+    """
+    global _requests_session
+    with _requests_lock:
+        if _requests_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _requests_session = session
+            openai.requestssession = session
+
+    return _requests_session
+
+
+class HTTPSession:
+    """
+    Persistent connections to one API, owned by an assistant.
+
+    Left to itself the SDK opens a new aiohttp session (so a new DNS lookup,
+    TCP and TLS handshake) for every streamed request. This keeps one pooled
+    keep-alive session per event loop instead, hands it to the SDK for the
+    duration of each call, and can open a connection ahead of time with
+    `warm_up` so the first request doesn't pay for the handshake either.
+    """
+
+    def __init__(
+        self,
+        api_base: str,
+        *,
+        pool_size: int = HTTP_POOL_SIZE,
+        keepalive: float = HTTP_KEEPALIVE,
+    ):
+        self.api_base = api_base.rstrip("/")
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        get_requests_session()  # blocking SDK calls go through the shared pool
+
+    @property
+    def requests(self) -> requests.Session:
+        return get_requests_session()
+
+    def session(self) -> aiohttp.ClientSession:
+        """The pooled session of the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            trace = aiohttp.TraceConfig()
+            trace.on_request_end.append(_track_response)
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.pool_size, keepalive_timeout=self.keepalive
+                ),
+                trace_configs=[trace],
+            )
+            self._loop = loop
+
+        return self._session
+
+    @contextmanager
+    def use(self) -> Iterator[list[aiohttp.ClientResponse]]:
+        """
+        Make SDK calls made inside the block go through the pooled session.
+        Yields the responses they got: the SDK never releases the response of
+        a stream on a session it was handed, so one that is given up on keeps
+        downloading (and being billed) until it's passed to `release`.
+        """
+        responses: list[aiohttp.ClientResponse] = []
+        token = openai.aiosession.set(self.session())
+        tracking = _responses.set(responses)
+        try:
+            yield responses
+        finally:
+            _responses.reset(tracking)
+            openai.aiosession.reset(token)
+
+    @staticmethod
+    def release(responses: list[aiohttp.ClientResponse]) -> None:
+        """
+        Hand the connections of `responses` back: to the pool if they were
+        read to the end, closed if they were cut short
+        """
+        for response in responses:
+            response.release()
+
+    async def warm_up(self) -> None:
+        """
+        Open a connection to the API and leave it in the pool. Any response
+        will do (it's unauthenticated), all that matters is the handshake.
+        """
+        async with self.session().get(f"{self.api_base}/models") as response:
+            await response.read()
+
+    def warm_up_sync(self) -> None:
+        """`warm_up` for the blocking client"""
+        self.requests.get(f"{self.api_base}/models").close()
+
+    async def aclose(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+async def _track_response(
+    session: aiohttp.ClientSession,
+    context: object,
+    params: aiohttp.TraceRequestEndParams,
+) -> None:
+    responses = _responses.get()
+    if responses is not None:
+        responses.append(params.response)
@@ -0,0 +1,387 @@
+import json
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Iterator
+
+from .conversation import Conversation, ConversationEntry, Message
+from .id import id_time
+from .search import SearchHit, SearchIndex
+
+
+def get_saved_conversations_path() -> Path:
+    """Return the path where conversations are to be saved/loaded from"""
+    GPT_CACHE_DIR = os.getenv("GPT_CACHE_DIR")
+    HOME_DIR = os.getenv("HOME")
+
+    if not GPT_CACHE_DIR:
+        # if no GPT_CACHE_DIR env provided, default to $HOME... ensure it exists!
+        assert HOME_DIR, "Missing $HOME env var"
+
+    return Path(
+        GPT_CACHE_DIR if GPT_CACHE_DIR else HOME_DIR,  # type: ignore
+        ".cache",
+        "gpyt",
+        "conversations",
+    )
+
+
+class ConversationStore:
+    """
+    Append-only storage for conversations.
+
+    Each conversation lives in its own `YYYY/MM/DD/convo-<id>.jsonl` file, the
+    (UTC) day its id was made. Ids are time-ordered, so shard and file names
+    sort by creation and the newest conversations are found with directory
+    listings alone. Conversations from before time-ordered ids stay flat in
+    the store's root. A file holds:
+
+        {"type": "conversation", "id": ..., "summary": ...}
+        {"type": "message", "id": ..., "role": ..., "content": ...}
+        {"type": "summary", "summary": ...}   <- only if the summary changes
+        {"type": "commit", "records": 3}      <- closes every save
+
+    Saving only appends the records that aren't on disk yet, so a turn costs
+    the same no matter how long the conversation is. A save is written to an
+    O_APPEND file followed by an fsync, and ends with a commit record counting
+    its records. When reading, records no commit covers (a save cut short by
+    a crash) are dropped, so a save is either fully there or not at all.
+    Files from before commit records are read line by line as they were.
+
+    Alongside the conversations, `manifest.jsonl` holds one ConversationEntry
+    per save (the last one for an id wins), so listing conversations never has
+    to open the conversations themselves, and every saved message is fed to
+    a full-text SearchIndex.
+    """
+
+    PREFIX = "convo-"
+    SUFFIX = ".jsonl"
+    LEGACY_SUFFIX = ".json"
+    MANIFEST = "manifest.jsonl"
+    MANIFEST_SLACK = 64  # superseded manifest lines tolerated before compacting
+    COMMIT = "commit"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.manifest_path = Path(path, self.MANIFEST)
+        # conversation id -> (messages on disk, summary on disk)
+        self._persisted: dict[str, tuple[int, str]] = {}
+        self._uncommitted: set[str] = set()  # ids whose files predate commits
+        self._entries: dict[str, ConversationEntry] | None = None
+        self.search_index = SearchIndex(path)
+        self._indexing = Lock()
+
+    def path_for(self, conversation_id: str) -> Path:
+        name = f"{self.PREFIX}{conversation_id}{self.SUFFIX}"
+        created = id_time(conversation_id)
+        if created is None:  # saved before ids were time-ordered
+            return Path(self.path, name)
+
+        day = time.gmtime(created)
+        return Path(
+            self.path,
+            f"{day.tm_year:04d}",
+            f"{day.tm_mon:02d}",
+            f"{day.tm_mday:02d}",
+            name,
+        )
+
+    def exists(self, conversation_id: str) -> bool:
+        return self.path_for(conversation_id).exists()
+
+    def list_paths(self) -> list[Path]:
+        return self.recent_paths()
+
+    def recent_paths(self, limit: int | None = None) -> list[Path]:
+        """
+        The `limit` (or all) most recently created conversations, newest first,
+        then the unordered flat ones. Only directory listings, no per-file
+        stat, and only as many day shards as it takes to fill `limit`.
+        """
+        paths: list[Path] = []
+        for shard in self._shards():
+            for name in sorted(self._conversation_names(shard), reverse=True):
+                paths.append(Path(shard, name))
+                if limit is not None and len(paths) >= limit:
+                    return paths
+
+        paths.extend(
+            Path(self.path, name) for name in self._conversation_names(self.path)
+        )
+        return paths[:limit]
+
+    def _shards(self) -> Iterator[str]:
+        """Day shard directories, newest first"""
+        for year in self._subdirs(str(self.path)):
+            for month in self._subdirs(year):
+                yield from self._subdirs(month)
+
+    def _subdirs(self, path: str) -> list[str]:
+        try:
+            with os.scandir(path) as it:  # d_type, so no stat either
+                names = [e.name for e in it if e.name.isdigit() and e.is_dir()]
+        except FileNotFoundError:
+            return []
+
+        return [os.path.join(path, name) for name in sorted(names, reverse=True)]
+
+    def _conversation_names(self, path: str | Path) -> list[str]:
+        try:
+            names = os.listdir(path)
+        except FileNotFoundError:
+            return []
+
+        return [
+            name
+            for name in names
+            if name.startswith(self.PREFIX) and name.endswith(self.SUFFIX)
+        ]
+
+    def save(self, conversation: Conversation) -> Path:
+        """Append whatever part of `conversation` isn't on disk yet"""
+        path = self.path_for(conversation.id)
+        persisted = self._persisted.get(conversation.id, None)
+        if persisted is None and path.exists():
+            persisted = self._read_progress(path)
+
+        records: list[dict] = []
+        if persisted is None:
+            records.append(
+                {
+                    "type": "conversation",
+                    "id": conversation.id,
+                    "summary": conversation.summary,
+                }
+            )
+            persisted = (0, conversation.summary)
+
+        written, summary = persisted
+        if conversation.summary != summary:
+            records.append({"type": "summary", "summary": conversation.summary})
+        for message in conversation.log[written:]:
+            records.append({"type": "message", **message.dict()})
+
+        if records:
+            records.append({"type": self.COMMIT, "records": len(records)})
+            if conversation.id in self._uncommitted:  # vouch for what's there
+                records.insert(0, {"type": self.COMMIT})
+                self._uncommitted.discard(conversation.id)
+            os.makedirs(path.parent, exist_ok=True)
+            self._append(path, records)
+            self._update_manifest(
+                ConversationEntry.from_conversation(conversation, time.time())
+            )
+            self.search_index.add(conversation.id, conversation.log[written:])
+
+        self._persisted[conversation.id] = (
+            len(conversation.log),
+            conversation.summary,
+        )
+        return path
+
+    def entries(self) -> list[ConversationEntry]:
+        """All saved conversations, least recently saved first"""
+        if self._entries is None:
+            self._entries = self._load_manifest()
+
+        return sorted(self._entries.values(), key=lambda e: e.mtime)
+
+    def entry(self, conversation_id: str) -> ConversationEntry | None:
+        if self._entries is None:
+            self._entries = self._load_manifest()
+
+        return self._entries.get(conversation_id, None)
+
+    @property
+    def search_ready(self) -> bool:
+        """Whether searching is served by the index, without building it"""
+        if self._indexing.locked():
+            return False  # being built, don't wait on it
+        return self.search_index.is_built
+
+    def build_search_index(self) -> None:
+        """
+        Index every saved conversation, unless that was done already. It reads
+        them all, so the app calls it from a worker thread.
+        """
+        with self._indexing:  # a second caller waits for the first build
+            if not self.search_index.is_built:
+                self.search_index.build(
+                    # read, not `load`: saves run alongside on the event loop
+                    self._read(path)[0]
+                    for path in self.list_paths()
+                )
+
+    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+        """Full-text search over every saved message, best hits first"""
+        self.build_search_index()
+        return self.search_index.search(query, limit)
+
+    def _update_manifest(self, entry: ConversationEntry) -> None:
+        if self._entries is None and not self.manifest_path.exists():
+            return  # nothing to keep up to date, the next read rebuilds it
+
+        if self._entries is not None:
+            self._entries[entry.id] = entry
+        self._append(self.manifest_path, [entry.dict()])
+
+    def _load_manifest(self) -> dict[str, ConversationEntry]:
+        if not self.manifest_path.exists():
+            return self._rebuild_manifest()
+
+        entries: dict[str, ConversationEntry] = {}
+        lines = 0
+        for record in self._read_records(self.manifest_path):
+            entry = ConversationEntry.parse_obj(record)
+            entries[entry.id] = entry
+            lines += 1
+
+        if lines > len(entries) + self.MANIFEST_SLACK:
+            self._write_manifest(entries)
+
+        return entries
+
+    def _rebuild_manifest(self) -> dict[str, ConversationEntry]:
+        """
+        One-off scan of every conversation, for stores without a manifest.
+        Entries are dated by their file's last write, like `save` dates them,
+        not by their id's creation time: a conversation continued later
+        sorts by when it was continued.
+        """
+        entries: dict[str, ConversationEntry] = {}
+        for path in self.list_paths():
+            conversation = self.load(path)
+            entries[conversation.id] = ConversationEntry.from_conversation(
+                conversation, path.stat().st_mtime
+            )
+
+        if entries:
+            self._write_manifest(entries)
+        return entries
+
+    def _write_manifest(self, entries: dict[str, ConversationEntry]) -> None:
+        ordered = sorted(entries.values(), key=lambda e: e.mtime)
+        self._replace(self.manifest_path, [entry.dict() for entry in ordered])
+
+    def _replace(self, path: Path, records: list[dict]) -> None:
+        """Atomically swap `path` for a file holding exactly `records`"""
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.unlink(missing_ok=True)
+        self._append(tmp_path, records)
+        os.replace(tmp_path, path)
+
+    def _append(self, path: Path, records: list[dict]) -> None:
+        data = "".join(json.dumps(record) + "\n" for record in records).encode()
+        fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data  # terminate a torn line left by a crash
+            view = memoryview(data)
+            while view:  # a write may be short, the rest follows it
+                view = view[os.write(fd, view) :]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _read_records(self, path: Path) -> list[dict]:
+        records = []
+        with open(path, "r") as fd:
+            for line in fd:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue  # torn write, that save never completed
+
+        return records
+
+    def _read_progress(self, path: Path) -> tuple[int, str]:
+        conversation = self.load(path)
+        return (len(conversation.log), conversation.summary)
+
+    def _committed_records(self, path: Path) -> tuple[list[dict], bool]:
+        """
+        The records of `path` that a commit covers, and whether it has any
+        commit at all. Without any (a file from before commit records) every
+        record counts.
+        """
+        committed: list[dict] = []
+        pending: list[dict] = []
+        has_commits = False
+        for record in self._read_records(path):
+            if record.get("type") != self.COMMIT:
+                pending.append(record)
+                continue
+
+            has_commits = True
+            count = record.get("records", None)
+            # a bare commit covers everything before it, a counted one only
+            # the save it closes: anything before that never committed
+            committed.extend(pending if count is None else pending[-count:])
+            pending = []
+
+        if not has_commits:
+            return pending, False
+        return committed, True
+
+    def load(self, path: Path) -> Conversation:
+        conversation, has_commits = self._read(path)
+        if not has_commits:
+            self._uncommitted.add(conversation.id)
+        self._persisted[conversation.id] = (
+            len(conversation.log),
+            conversation.summary,
+        )
+        return conversation
+
+    def _read(self, path: Path) -> tuple[Conversation, bool]:
+        """The conversation in `path`, and whether it has commit records"""
+        conversation = None
+        records, has_commits = self._committed_records(path)
+        for record in records:
+            kind = record.pop("type")
+            if kind == "conversation":
+                conversation = Conversation(log=[], **record)
+            elif kind == "summary":
+                assert conversation, f"Summary before conversation header in {path}"
+                conversation.summary = record["summary"]
+            elif kind == "message":
+                assert conversation, f"Message before conversation header in {path}"
+                conversation.log.append(Message.from_record(record))
+
+        assert conversation, f"Missing conversation header in {path}"
+        return conversation, has_commits
+
+    def migrate_legacy(self) -> int:
+        """
+        Convert whole-file `convo-<id>.json` conversations to the append-only
+        format. Returns the number of conversations migrated.
+        """
+        migrated = 0
+        for legacy_path in self.path.glob(f"{self.PREFIX}*{self.LEGACY_SUFFIX}"):
+            with open(legacy_path, "r") as fd:
+                conversation = Conversation.parse_obj(json.load(fd))
+
+            path = self.path_for(conversation.id)
+            os.makedirs(path.parent, exist_ok=True)
+            records = [
+                {
+                    "type": "conversation",
+                    "id": conversation.id,
+                    "summary": conversation.summary,
+                },
+                *({"type": "message", **m.dict()} for m in conversation.log),
+            ]
+            records.append({"type": self.COMMIT, "records": len(records)})
+            self._replace(path, records)
+            stat = legacy_path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))  # keep order
+            self._update_manifest(
+                ConversationEntry.from_conversation(conversation, stat.st_mtime)
+            )
+            self.search_index.add(conversation.id, conversation.log)
+            legacy_path.unlink()
+            migrated += 1
+
+        return migrated
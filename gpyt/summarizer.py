@@ -0,0 +1,132 @@
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .assistant import Assistant
+
+LOCAL = "local"
+LLM = "llm"
+
+SUMMARIZERS = (LOCAL, LLM)
+
+# words that never make it into a title, including the usual ways of asking
+STOP_WORDS = frozenset("""
+    a about above after again against all also am an and any are as at be
+    because been before being below between both but by can could did do does
+    doing down during each few for from further had has have having he her here
+    hers herself him himself his how i if in into is it its itself just me more
+    most my myself no nor not now of off on once only or other our ours
+    ourselves out over own same she should so some such than that the their
+    theirs them themselves then there these they this those through to too
+    under until up very was we were what when where which while who whom why
+    will with would you your yours yourself yourselves
+    please thanks thank hi hello hey
+    explain tell give show help make write create want need know like get
+    way use using used something anything thing things
+    don't doesn't isn't can't won't i'm i've i'd it's what's that's there's how's
+    """.split())
+
+TOKEN = re.compile(r"\w[\w+#'.-]*\w[+#]*|\w[+#]*|[^\w\s]")
+
+
+class Summarizer(ABC):
+    """Titles a conversation after its first user message"""
+
+    blocking = False  # True if it has to be run off the UI thread
+
+    @abstractmethod
+    def summarize(self, text: str) -> str:
+        """A short title for a conversation that starts with `text`"""
+
+
+class KeywordSummarizer(Summarizer):
+    """
+    Offline titles from the key phrases of the message itself.
+
+    Phrases are the runs of words between stop words and punctuation, scored
+    the RAKE way (a word is worth its co-occurrence degree over its frequency,
+    a phrase the sum of its words). The best phrases are kept, in the order
+    they appear, until the title is `max_words` long. No network, no model,
+    just a pass over the first `max_chars` of the message.
+    """
+
+    FALLBACK = "User Question"
+
+    def __init__(self, max_words: int = 5, max_chars: int = 2000):
+        self.max_words = max_words
+        self.max_chars = max_chars
+
+    def _phrases(self, text: str) -> list[list[str]]:
+        phrases: list[list[str]] = [[]]
+        for token in TOKEN.findall(text[: self.max_chars]):
+            if token.lower() in STOP_WORDS or not token[0].isalnum():
+                if phrases[-1]:
+                    phrases.append([])
+                continue
+            phrases[-1].append(token)
+
+        return [phrase for phrase in phrases if phrase]
+
+    def summarize(self, text: str) -> str:
+        phrases = self._phrases(text)
+        if not phrases:
+            return self.FALLBACK
+
+        frequency: Counter[str] = Counter()
+        degree: Counter[str] = Counter()
+        for phrase in phrases:
+            for word in phrase:
+                frequency[word.lower()] += 1
+                degree[word.lower()] += len(phrase)
+
+        def score(phrase: list[str]) -> float:
+            return sum(degree[w.lower()] / frequency[w.lower()] for w in phrase)
+
+        # best first, earliest first among equals
+        ranked = sorted(range(len(phrases)), key=lambda i: (-score(phrases[i]), i))
+        chosen: list[int] = []
+        seen: set[str] = set()
+        words = 0
+        for i in ranked:
+            key = " ".join(phrases[i]).lower()
+            if key in seen:
+                continue
+            if words + len(phrases[i]) > self.max_words:
+                if chosen:
+                    continue
+                phrases[i] = phrases[i][: self.max_words]
+            seen.add(key)
+            chosen.append(i)
+            words += len(phrases[i])
+
+        title = [word for i in sorted(chosen) for word in phrases[i]]
+        return " ".join(self._capitalize(word) for word in title)
+
+    @staticmethod
+    def _capitalize(word: str) -> str:
+        # leave words that already carry case (TCP, iPhone, macOS) alone
+        if any(c.isupper() for c in word):
+            return word
+        return word[:1].upper() + word[1:]
+
+
+class AssistantSummarizer(Summarizer):
+    """Asks the selected model for a title, one extra request per conversation"""
+
+    blocking = True
+
+    def __init__(self, get_assistant: Callable[[], "Assistant"]):
+        self._get_assistant = get_assistant
+
+    def summarize(self, text: str) -> str:
+        return self._get_assistant().get_conversation_summary(text)
+
+
+def make_summarizer(name: str, get_assistant: Callable[[], "Assistant"]) -> Summarizer:
+    assert name in SUMMARIZERS, f"Unknown summarizer {name!r}"
+    if name == LLM:
+        return AssistantSummarizer(get_assistant)
+
+    return KeywordSummarizer()
@@ -0,0 +1,83 @@
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+from typing import TYPE_CHECKING
+
+from .config import TOKENIZER_CACHE_SIZE, TOKENIZER_ENCODING
+
+if TYPE_CHECKING:
+    from tiktoken import Encoding
+
+
+class Tokenizer:
+    """
+    Process-wide token counter.
+
+    The tiktoken encoding is only loaded the first time something is counted,
+    and counts are memoized in a bounded LRU keyed by a hash of the content so
+    text that has already been counted (system prompts, past messages) is
+    never encoded twice.
+    """
+
+    def __init__(self, encoding: str, cache_size: int):
+        self.encoding_name = encoding
+        self.cache_size = cache_size
+        self._encoding: "Encoding | None" = None
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def encoding(self) -> "Encoding":
+        if self._encoding is None:
+            import tiktoken
+
+            with self._lock:
+                if self._encoding is None:
+                    self._encoding = tiktoken.get_encoding(self.encoding_name)
+
+        return self._encoding
+
+    def encode(self, text: str) -> list[int]:
+        return self.encoding.encode(text)
+
+    def count(self, text: str) -> int:
+        """Number of tokens in `text`, served from cache when possible"""
+        if not text:
+            return 0
+
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        with self._lock:
+            count = self._counts.get(key, None)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return count
+
+        count = len(self.encode(text))
+
+        with self._lock:
+            self.misses += 1
+            self._counts[key] = count
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+
+        return count
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.hits = self.misses = 0
+
+
+_tokenizer: Tokenizer | None = None
+
+
+def get_tokenizer() -> Tokenizer:
+    """Return the shared tokenizer, creating it on first use"""
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = Tokenizer(TOKENIZER_ENCODING, TOKENIZER_CACHE_SIZE)
+
+    return _tokenizer
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# importing gpyt parses the command line and wants an API key, give it clean ones
+sys.argv = sys.argv[:1]
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from gpyt import tokenizer  # noqa: E402
+
+
+class ByteEncoding:
+    """Stands in for a tiktoken encoding, which is downloaded on first use"""
+
+    def encode(self, text: str) -> list[int]:
+        return list(text.encode())
+
+
+@pytest.fixture(autouse=True)
+def fake_tokenizer(monkeypatch) -> tokenizer.Tokenizer:
+    """A shared tokenizer counting a token per byte, so no test needs the network"""
+    fake = tokenizer.Tokenizer("bytes", cache_size=1024)
+    fake._encoding = ByteEncoding()  # type: ignore
+    monkeypatch.setattr(tokenizer, "_tokenizer", fake)
+    return fake
@@ -0,0 +1,137 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from gpyt.batch import BatchWriter, finished_ids, load_prompts, read_jsonl, run_batch
+
+
+class EchoAssistant:
+    """Answers a prompt with itself, fails on "boom", and counts what it was asked"""
+
+    asked: list[str] = []
+
+    def __init__(self):
+        self.ledger = SimpleNamespace(input_tokens=1, output_tokens=2, model="echo")
+        self.closed = False
+
+    def clear_history(self) -> None:
+        pass
+
+    async def astream(self, prompt: str):
+        self.asked.append(prompt)
+        if prompt == "boom":
+            raise RuntimeError("no answer")
+        for word in prompt.split():
+            await asyncio.sleep(0)
+            yield word
+
+    def log_assistant_response(self, response: str) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def asked():
+    EchoAssistant.asked = []
+    return EchoAssistant.asked
+
+
+def _write(path, *lines: str) -> None:
+    path.write_text("".join(line + "\n" for line in lines))
+
+
+def _run(prompts, output, concurrency=2) -> int:
+    return asyncio.run(
+        run_batch(EchoAssistant, prompts, output, concurrency=concurrency)
+    )
+
+
+def test_read_jsonl_skips_torn_lines(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": "1"}\n{"id": "2"}\n{"id": ')
+
+    assert read_jsonl(path) == [{"id": "1"}, {"id": "2"}]
+    assert read_jsonl(tmp_path / "missing.jsonl") == []
+
+
+def test_load_prompts_numbers_lines_without_an_id(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    _write(path, '"bare"', '{"prompt": "with id", "id": 7}', '{"prompt": "plain"}')
+
+    assert load_prompts(path) == [
+        {"prompt": "bare", "id": "1"},
+        {"prompt": "with id", "id": "7"},
+        {"prompt": "plain", "id": "3"},
+    ]
+
+
+def test_load_prompts_rejects_records_without_a_prompt(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    _write(path, '{"id": 1}')
+
+    with pytest.raises(AssertionError, match="Line 1"):
+        load_prompts(path)
+
+
+def test_finished_ids_leave_out_errors(tmp_path):
+    path = tmp_path / "out.jsonl"
+    _write(path, '{"id": "1"}', '{"id": "2", "error": "RateLimitError"}')
+
+    assert finished_ids(path) == {"1"}
+
+
+def test_writer_terminates_a_torn_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text('{"id": "1"}\n{"id": ')
+
+    writer = BatchWriter(path)
+    writer.write({"id": "2"})
+    writer.close()
+
+    assert read_jsonl(path) == [{"id": "1"}, {"id": "2"}]
+
+
+def test_run_batch_writes_every_result(tmp_path, asked):
+    output = tmp_path / "out.jsonl"
+    prompts = [{"id": str(i), "prompt": f"say {i}"} for i in range(5)]
+
+    assert _run(prompts, output) == 5
+
+    results = {r["id"]: r for r in read_jsonl(output)}
+    assert sorted(asked) == sorted(p["prompt"] for p in prompts)
+    assert results["3"]["response"] == "say3"
+    assert results["3"]["model"] == "echo"
+    assert results["3"]["ttft_ms"] is not None
+
+
+def test_run_batch_records_failures(tmp_path, asked):
+    output = tmp_path / "out.jsonl"
+
+    assert _run([{"id": "1", "prompt": "boom"}], output) == 1
+
+    (result,) = read_jsonl(output)
+    assert result["error"] == "RuntimeError: no answer"
+    assert result["ttft_ms"] is None
+
+
+def test_run_batch_resumes_where_it_left_off(tmp_path, asked):
+    output = tmp_path / "out.jsonl"
+    _write(
+        output,
+        json.dumps({"id": "1", "response": "done"}),
+        json.dumps({"id": "2", "error": "RuntimeError: no answer"}),
+        '{"id": "3", "resp',  # torn by the interruption
+    )
+    prompts = [{"id": str(i), "prompt": f"say {i}"} for i in range(1, 5)]
+
+    assert _run(prompts, output) == 3
+
+    assert sorted(asked) == ["say 2", "say 3", "say 4"]
+    assert finished_ids(output) == {"1", "2", "3", "4"}
+
+    assert _run(prompts, output) == 0  # nothing left to do
+    assert len(asked) == 3
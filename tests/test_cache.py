@@ -0,0 +1,129 @@
+import pytest
+
+from gpyt import cache
+from gpyt.cache import ResponseCache, replay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A wall clock that only moves when the test says so"""
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    return now
+
+
+def _ask(text: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": "Be brief."},
+        {"role": "user", "content": text},
+    ]
+
+
+def test_replay_rebuilds_the_response():
+    content = "Hello  there,\nhow are you?"
+    deltas = list(replay(content))
+
+    assert len(deltas) == 5
+    assert "".join(deltas) == content
+
+
+def test_key_ignores_whitespace_but_not_model_or_role():
+    key = ResponseCache.key("gpt-4", _ask("what is  tcp?"))
+
+    assert key == ResponseCache.key("gpt-4", _ask(" what is tcp?\n"))
+    assert key != ResponseCache.key("gpt-3.5-turbo", _ask("what is tcp?"))
+    assert key != ResponseCache.key(
+        "gpt-4", [{"role": "assistant", "content": "what is tcp?"}]
+    )
+
+
+def test_put_then_get(tmp_path, clock):
+    responses = ResponseCache(tmp_path)
+    responses.put("gpt-4", _ask("tcp?"), "A protocol.")
+
+    assert responses.get("gpt-4", _ask("tcp?")) == "A protocol."
+    assert responses.get("gpt-4", _ask("udp?")) is None
+    assert responses.get("gpt-3.5-turbo", _ask("tcp?")) is None
+
+
+def test_empty_responses_are_not_stored(tmp_path, clock):
+    responses = ResponseCache(tmp_path)
+    responses.put("gpt-4", _ask("tcp?"), "")
+
+    assert responses.get("gpt-4", _ask("tcp?")) is None
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    responses = ResponseCache(tmp_path, ttl=60)
+    responses.put("gpt-4", _ask("tcp?"), "A protocol.")
+
+    clock[0] += 59
+    assert responses.get("gpt-4", _ask("tcp?")) == "A protocol."
+
+    clock[0] += 1
+    assert responses.get("gpt-4", _ask("tcp?")) is None
+
+
+def test_expired_entries_are_dropped_on_put(tmp_path, clock):
+    responses = ResponseCache(tmp_path, ttl=60)
+    responses.put("gpt-4", _ask("tcp?"), "A protocol.")
+
+    clock[0] += 60
+    responses.put("gpt-4", _ask("udp?"), "Another one.")
+
+    db = responses._connect()
+    assert db.execute("SELECT COUNT(*) FROM responses").fetchone() == (1,)
+
+
+def test_least_recently_used_entries_go_first(tmp_path, clock):
+    responses = ResponseCache(tmp_path, max_bytes=20)
+    responses.put("gpt-4", _ask("one"), "x" * 8)
+    clock[0] += 1
+    responses.put("gpt-4", _ask("two"), "x" * 8)
+    clock[0] += 1
+    assert responses.get("gpt-4", _ask("one"))  # now used after "two"
+
+    clock[0] += 1
+    responses.put("gpt-4", _ask("three"), "x" * 8)
+
+    assert responses.get("gpt-4", _ask("one"))
+    assert responses.get("gpt-4", _ask("two")) is None
+    assert responses.get("gpt-4", _ask("three"))
+
+
+def test_entries_persist_across_instances(tmp_path, clock):
+    ResponseCache(tmp_path).put("gpt-4", _ask("tcp?"), "A protocol.")
+
+    assert ResponseCache(tmp_path).get("gpt-4", _ask("tcp?")) == "A protocol."
+
+
+def test_clear(tmp_path, clock):
+    responses = ResponseCache(tmp_path)
+    responses.put("gpt-4", _ask("tcp?"), "A protocol.")
+    responses.clear()
+
+    assert responses.get("gpt-4", _ask("tcp?")) is None
+
+
+def test_stats_count_hits_and_misses(tmp_path, clock):
+    responses = ResponseCache(tmp_path)
+    assert responses.stats() == {
+        "hits": 0,
+        "misses": 0,
+        "hit_rate": 0.0,
+        "entries": 0,
+        "bytes": 0,
+    }
+
+    responses.put("gpt-4", _ask("tcp?"), "A protocol.")
+    responses.get("gpt-4", _ask("tcp?"))
+    responses.get("gpt-4", _ask("tcp?"))
+    responses.get("gpt-4", _ask("udp?"))
+
+    assert responses.stats() == {
+        "hits": 2,
+        "misses": 1,
+        "hit_rate": pytest.approx(2 / 3),
+        "entries": 1,
+        "bytes": len("A protocol."),
+    }
@@ -0,0 +1,107 @@
+from gpyt.context import FULL, SLIDING, SUMMARY, ContextWindow
+
+SYSTEM = {"role": "system", "content": "system"}
+
+
+def _messages(*contents: str) -> list[dict[str, str]]:
+    return [SYSTEM, *({"role": "user", "content": c} for c in contents)]
+
+
+def _window(messages: list[dict[str, str]], **kwargs) -> ContextWindow:
+    """A window fed `messages`, counting one token per character"""
+    window = ContextWindow(**kwargs)
+    window.reset(len(SYSTEM["content"]))
+    for message in messages[1:]:
+        window.append(len(message["content"]))
+    return window
+
+
+def test_full_sends_everything():
+    messages = _messages("aaaa", "bbbb", "cccc")
+    window = _window(messages, budget=10, policy=FULL)
+
+    assert window.select(messages) == messages
+    assert window.tokens == 6 + 12
+
+
+def test_sliding_is_the_default():
+    messages = _messages("aaaa", "bbbb", "cccc")
+    window = _window(messages, budget=15)
+
+    assert window.policy == SLIDING
+    assert window.select(messages) == [SYSTEM, messages[2], messages[3]]
+
+
+def test_no_budget_means_full():
+    window = ContextWindow(budget=None, policy=SLIDING)
+
+    assert window.policy == FULL
+
+
+def test_sliding_drops_the_oldest_messages():
+    messages = _messages("aaaa", "bbbb", "cccc")
+    window = _window(messages, budget=15, policy=SLIDING)
+
+    assert window.select(messages) == [SYSTEM, messages[2], messages[3]]
+    assert window.tokens == 6 + 8
+
+
+def test_sliding_can_unpin_the_system_prompt():
+    messages = _messages("aaaa", "bbbb", "cccc")
+    window = _window(messages, budget=12, policy=SLIDING, pin_system_prompt=False)
+
+    assert window.select(messages) == messages[1:]
+    assert window.tokens == 12
+
+
+def test_sliding_always_sends_the_latest_message():
+    messages = _messages("aaaa", "b" * 50)
+    window = _window(messages, budget=10, policy=SLIDING)
+
+    assert window.select(messages) == [SYSTEM, messages[2]]
+
+
+def test_summary_folds_evicted_messages():
+    calls = []
+
+    def summarize(summary: str, transcript: str) -> str:
+        calls.append((summary, transcript))
+        return "sum"
+
+    messages = _messages("aaaa", "bbbb", "cccc")
+    window = _window(messages, budget=17, policy=SUMMARY, summarize=summarize)
+    assert window.folding
+
+    selected = window.select(messages)
+
+    assert calls == [("", "user: aaaa")]
+    assert not window.folding
+    assert selected == [
+        SYSTEM,
+        {"role": "system", "content": "Summary of the earlier conversation: sum"},
+        messages[2],
+        messages[3],
+    ]
+    assert window.tokens == 6 + len("sum") + 8
+
+    window.select(messages)  # nothing new was evicted
+    assert len(calls) == 1
+
+
+def test_summary_keeps_the_last_summary_when_folding_fails():
+    def summarize(summary: str, transcript: str) -> str:
+        if summary:
+            raise RuntimeError("API down")
+        return "gist"
+
+    messages = _messages("aaaa", "bbbb")
+    window = _window(messages, budget=15, policy=SUMMARY, summarize=summarize)
+    window.select(messages)
+    messages.append({"role": "user", "content": "cccc"})
+    window.append(4)
+
+    selected = window.select(messages)
+
+    assert window.summary == "gist"
+    assert selected[1]["content"].endswith("gist")
+    assert not window.folding
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from gpyt.hedge import PRIMARY, SECONDARY, Hedger
+from gpyt.metrics import Exporter, Metrics
+
+
+class Collect(Exporter):
+    def __init__(self):
+        self.records = []
+
+    def export(self, record) -> None:
+        self.records.append(record)
+
+
+class Racer:
+    """A backend's stream: `delay` seconds to the first delta, or to `error`"""
+
+    def __init__(self, deltas, delay=0.0, error=None):
+        self.deltas = deltas
+        self.delay = delay
+        self.error = error
+        self.started = False
+        self.closed = False
+
+    async def stream(self):
+        self.started = True
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            for delta in self.deltas:
+                yield delta
+        finally:
+            self.closed = True
+
+
+def _race(primary: Racer, secondary: Racer, after=0.05):
+    exporter = Collect()
+    hedger = Hedger("gpt4", after=after, metrics=Metrics(exporter))
+
+    async def run():
+        hedged = hedger.stream("gpt", primary.stream(), secondary.stream)
+        return [delta async for delta in hedged], hedged.winner
+
+    deltas, winner = asyncio.run(run())
+    return deltas, winner, hedger, exporter.records
+
+
+def test_fast_primary_is_not_hedged():
+    primary, secondary = Racer(["a", "b"]), Racer(["x"])
+
+    deltas, winner, hedger, [record] = _race(primary, secondary)
+
+    assert deltas == ["a", "b"]
+    assert winner == PRIMARY
+    assert not secondary.started
+    assert hedger.win_rates() == {PRIMARY: 1.0}
+    assert (record.hedged, record.winner, record.secondary_ttft_ms) == (
+        False,
+        PRIMARY,
+        None,
+    )
+
+
+def test_slow_primary_loses_to_the_secondary():
+    primary, secondary = Racer(["a", "b"], delay=1), Racer(["x", "y"])
+
+    deltas, winner, hedger, [record] = _race(primary, secondary)
+
+    assert deltas == ["x", "y"]
+    assert winner == SECONDARY
+    assert primary.closed  # cancelled, not left streaming
+    assert hedger.win_rates() == {PRIMARY: 0.0, SECONDARY: 1.0}
+    assert (record.hedged, record.winner, record.primary_ttft_ms) == (
+        True,
+        SECONDARY,
+        None,
+    )
+
+
+def test_primary_still_wins_if_it_is_first_after_all():
+    primary, secondary = Racer(["a"], delay=0.1), Racer(["x"], delay=1)
+
+    deltas, winner, _, _ = _race(primary, secondary)
+
+    assert (deltas, winner) == (["a"], PRIMARY)
+    assert secondary.started and secondary.closed
+
+
+def test_failed_primary_starts_the_secondary_right_away():
+    primary = Racer(["a"], error=RuntimeError("down"))
+    secondary = Racer(["x"])
+
+    deltas, winner, _, _ = _race(primary, secondary, after=10)
+
+    assert (deltas, winner) == (["x"], SECONDARY)
+
+
+def test_both_failing_raises_the_primarys_error():
+    primary = Racer(["a"], error=RuntimeError("primary down"))
+    secondary = Racer(["x"], error=RuntimeError("secondary down"))
+
+    with pytest.raises(RuntimeError, match="primary down"):
+        _race(primary, secondary)
+
+
+def test_an_empty_stream_is_an_answer():
+    primary, secondary = Racer([]), Racer(["x"])
+
+    deltas, winner, _, _ = _race(primary, secondary)
+
+    assert (deltas, winner) == ([], PRIMARY)
+    assert not secondary.started
@@ -0,0 +1,149 @@
+import pytest
+
+from gpyt.assistant import Assistant
+from gpyt.conversation import Message
+from gpyt.history import ChatView
+
+SYSTEM = {"role": "system", "content": "Be brief."}
+
+
+def _log(*contents: str) -> list[Message]:
+    roles = ("user", "assistant")
+    return [
+        Message(id=str(i), role=roles[i % 2], content=content)
+        for i, content in enumerate(contents)
+    ]
+
+
+def _assistant(memory: bool = True) -> Assistant:
+    return Assistant(
+        api_key="sk-test", model="gpt-3.5-turbo", prompt="Be brief.", memory=memory
+    )
+
+
+def test_chat_view_indexing():
+    view = ChatView(SYSTEM, _log("hi", "hello", "bye"))
+
+    assert len(view) == 4
+    assert view[0] is SYSTEM
+    assert view[1] == {"role": "user", "content": "hi"}
+    assert view[3] == {"role": "user", "content": "bye"}
+    assert view[-1] == view[3]
+    assert view[-4] is SYSTEM
+    with pytest.raises(IndexError):
+        view[4]
+    with pytest.raises(IndexError):
+        view[-5]
+
+
+def test_chat_view_slicing():
+    view = ChatView(SYSTEM, _log("hi", "hello", "bye"))
+
+    assert view[:] == list(view)
+    assert view[1:] == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "bye"},
+    ]
+    assert view[:1] == [SYSTEM]
+    assert view[-2:] == [view[2], view[3]]
+    assert view[::2] == [SYSTEM, view[2]]
+    assert view[5:] == []
+
+
+def test_chat_view_reads_the_log_live():
+    log = _log("hi")
+    view = ChatView(SYSTEM, log)
+    log.append(Message(id="1", role="assistant", content="hello"))
+
+    assert len(view) == 3
+    assert view[-1] == {"role": "assistant", "content": "hello"}
+
+
+def test_attach_counts_the_log_once():
+    assistant = _assistant()
+    count = assistant.get_tokens_used
+    log = _log("hi", "hello")
+
+    assistant.attach(log)
+    assert assistant.log is log
+    assert list(assistant.messages)[1:] == list(ChatView(SYSTEM, log))[1:]
+    expected = count("Be brief.") + count("hi") + count("hello")
+    assert assistant.ledger.context_tokens == expected
+    assert assistant.context.tokens == expected
+
+    assistant.attach(log)  # again, e.g. switching back to this backend
+    assert assistant.ledger.context_tokens == expected
+
+
+def test_sync_counts_only_what_was_appended():
+    assistant = _assistant()
+    log = _log("hi", "hello")
+    assistant.attach(log)
+    before = assistant.ledger.context_tokens
+
+    log.append(Message(id="2", role="user", content="and then?"))
+    assistant._log_request("and then?", logged=True)
+
+    assert len(log) == 3  # the owner logged it, the assistant didn't again
+    assert assistant._recorded == 3
+    assert assistant.ledger.context_tokens == before + assistant.get_tokens_used(
+        "and then?"
+    )
+    assert [role for role, _ in assistant.ledger.entries] == [
+        "user",
+        "assistant",
+        "user",
+    ]
+
+
+def test_log_request_appends_to_an_unowned_log():
+    assistant = _assistant()
+    assistant._log_request("hi")
+
+    assert [m.content for m in assistant.log] == ["hi"]
+    assert assistant._recorded == 1
+
+
+def test_attach_without_memory_sends_no_history():
+    assistant = _assistant(memory=False)
+    log = _log("hi", "hello")
+    assistant.attach(log)
+
+    assert assistant.log is log
+    assert assistant.ledger.context_tokens == assistant.get_tokens_used("Be brief.")
+    assert assistant._select("next") == [
+        assistant.messages[0],
+        {"role": "user", "content": "next"},
+    ]
+
+
+def _palm():
+    from gpyt.palm_assistant import PalmAssistant
+
+    return PalmAssistant(api_key="")
+
+
+def _free():
+    pytest.importorskip("gpt4free")
+    from gpyt.free_assistant import FreeAssistant
+
+    return FreeAssistant()
+
+
+@pytest.mark.parametrize("make", [_palm, _free], ids=["palm", "free"])
+def test_every_backend_shares_the_history_api(make):
+    assistant = make()
+    log = _log("hi", "hello")
+
+    assistant.attach(log)
+    assert list(assistant.messages) == [
+        {"role": "system", "content": ""},
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+    ]
+    assert assistant.context.tokens == assistant.get_tokens_used("hihello")
+
+    assistant.clear_history()
+    assert len(assistant.messages) == 1
+    assert assistant.log is not log
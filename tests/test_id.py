@@ -0,0 +1,61 @@
+import time
+
+from gpyt.conversation import Conversation
+from gpyt.id import get_id, id_time
+from gpyt.store import ConversationStore
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def _id(ms: int, random: int = 0) -> str:
+    return f"{ms:012x}{random:020x}"
+
+
+def test_ids_are_strictly_increasing():
+    ids = [get_id() for _ in range(10_000)]
+
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert all(len(id) == 32 and id == id.lower() for id in ids)
+
+
+def test_id_time():
+    before = time.time()
+    created = id_time(get_id())
+
+    assert created is not None
+    assert before - 0.001 <= created <= time.time()
+    assert id_time(_id(1_234_567)) == 1_234.567
+    assert id_time("0" * 32) == 0  # no a-f digit at all, still an id
+
+
+def test_id_time_of_other_ids():
+    assert id_time("0123456789abcdef") is None  # from before time-ordered ids
+    assert id_time("0123456789ABCDEF0123456789ABCDEF") is None
+    assert id_time("g" * 32) is None
+
+
+def test_recent_paths(tmp_path):
+    store = ConversationStore(tmp_path)
+    start = 1_700_000_000_000
+    ids = [
+        _id(start, 1),
+        _id(start, 2),  # same day
+        _id(start + DAY_MS),
+        _id(start + 40 * DAY_MS),  # next month
+        _id(start + 400 * DAY_MS),  # next year
+    ]
+    for id in [*ids, "0123456789abcdef"]:
+        store.save(Conversation(id=id, summary=id, log=[]))
+
+    names = [path.name for path in store.recent_paths()]
+    assert names == [
+        *(f"convo-{id}.jsonl" for id in reversed(ids)),
+        "convo-0123456789abcdef.jsonl",  # flat ones come last
+    ]
+    assert store.recent_paths(2) == store.recent_paths()[:2]
+    assert store.recent_paths(2)[0].relative_to(tmp_path).parts[:3] == (
+        "2024",
+        "12",
+        "18",
+    )
@@ -0,0 +1,131 @@
+import pytest
+
+from gpyt.assistant import Assistant
+from gpyt.ledger import Spend, TokenLedger
+
+# per 1k tokens, see config.PRICING_LOOKUP
+GPT35_IN, GPT35_OUT = 0.0015 / 1000, 0.002 / 1000
+GPT4_IN, GPT4_OUT = 0.03 / 1000, 0.06 / 1000
+
+
+def test_record_message():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    ledger.reset("system")
+
+    assert ledger.record_message("user", "hello") == 5
+    assert ledger.record_message("assistant", "hi!") == 3
+    assert ledger.entries == [("user", 5), ("assistant", 3)]
+    assert ledger.context_tokens == 6 + 5 + 3
+    assert ledger.total_tokens == 0  # recorded, not billed
+
+
+def test_charge_request_bills_the_whole_context():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    ledger.reset("system")
+    ledger.record_message("user", "hello")
+
+    ledger.charge_request()
+    ledger.charge_request()
+
+    assert ledger.input_tokens == 2 * 11
+    assert ledger.price == pytest.approx(2 * 11 * GPT35_IN)
+
+
+def test_streamed_output_is_billed_once_per_chunk():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    chunks = [f"word{i} " for i in range(500)]
+
+    billed = [ledger.add_output_delta(chunk) for chunk in chunks]
+    ledger.add_output_delta("")
+
+    # every chunk on its own, never the response so far again
+    assert billed == [len(chunk) for chunk in chunks]
+    assert ledger.output_tokens == len("".join(chunks))
+    assert ledger.price == pytest.approx(ledger.output_tokens * GPT35_OUT)
+
+
+def test_replayed_output_is_counted_but_not_billed():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    ledger.replaying = True
+
+    assert ledger.add_output_delta("cached") == 6
+    assert ledger.output_tokens == 0
+    assert ledger.price == 0
+
+
+def test_finish_output_records_without_billing_again():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    ledger.reset("system")
+    for chunk in ("an ", "answer"):
+        ledger.add_output_delta(chunk)
+
+    assert ledger.finish_output("an answer") == 9
+    assert ledger.entries == [("assistant", 9)]
+    assert ledger.context_tokens == 6 + 9
+    assert ledger.output_tokens == 9
+
+
+def test_reset_and_forget():
+    ledger = TokenLedger("gpt-3.5-turbo")
+    ledger.record_message("user", "hello")
+    ledger.charge_request()
+
+    ledger.forget("system")
+    assert (ledger.entries, ledger.context_tokens) == ([], 6)
+    assert ledger.input_tokens == 5
+
+    ledger.reset("system")
+    assert (ledger.entries, ledger.context_tokens) == ([], 6)
+    assert (ledger.input_tokens, ledger.price) == (0, 0)
+
+
+def test_spend_sums_every_ledger_charging_it():
+    spend = Spend()
+    gpt35 = TokenLedger("gpt-3.5-turbo")
+    gpt4 = TokenLedger("gpt-4")
+    gpt35.spend = gpt4.spend = spend
+
+    gpt35.charge(100, 10)
+    gpt35.reset()  # e.g. attached to the conversation again
+    gpt4.charge(200)
+    gpt4.add_output_delta("twenty characters!!!")
+
+    assert (spend.input_tokens, spend.output_tokens) == (300, 30)
+    assert spend.total_tokens == 330
+    assert spend.price == pytest.approx(
+        100 * GPT35_IN + 10 * GPT35_OUT + 200 * GPT4_IN + 20 * GPT4_OUT
+    )
+
+
+def test_no_memory_keeps_the_totals():
+    assistant = Assistant(
+        api_key="sk-test", model="gpt-3.5-turbo", prompt="system", memory=False
+    )
+    for question in ("one", "three"):
+        assistant._log_request(question)
+        assistant.ledger.charge_request()
+
+    assert assistant.ledger.context_tokens == 6 + 5  # only the latest question
+    assert assistant.ledger.input_tokens == (6 + 3) + (6 + 5)
+
+
+def test_palm_sync_stream_bills_its_output():
+    from gpyt.palm_assistant import PalmAssistant
+
+    assistant = PalmAssistant(api_key="")  # no key: answers with the error text
+    answer = "".join(assistant.get_response_stream("hi"))
+
+    assert answer == PalmAssistant.API_ERROR_MESSAGE
+    assert assistant.ledger.output_tokens == len(answer.encode())
+
+
+def test_free_sync_stream_bills_its_output(monkeypatch):
+    pytest.importorskip("gpt4free")
+    from gpyt.free_assistant import FreeAssistant
+
+    assistant = FreeAssistant()
+    monkeypatch.setattr(assistant, "get_response", lambda _: "a free answer")
+    answer = "".join(assistant.get_response_stream("hi"))
+
+    assert answer == "a free answer"
+    assert assistant.ledger.output_tokens == len(answer)
@@ -0,0 +1,73 @@
+import pytest
+
+from gpyt import ratelimit
+from gpyt.ratelimit import RateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock that only moves when the test says so"""
+    now = [1000.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_reserve_within_capacity_is_immediate(clock):
+    bucket = TokenBucket(60)  # one a second
+
+    assert bucket.reserve(30) == 0
+    assert bucket.reserve(30) == 0
+    assert bucket.available == 0
+
+
+def test_reserve_past_capacity_waits_for_the_refill(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(50)
+
+    assert bucket.reserve(20) == pytest.approx(10)
+    assert bucket.reserve(5) == pytest.approx(15)  # queued behind the first
+
+    clock[0] += 15
+    assert bucket.reserve(0) == 0
+
+
+def test_reserve_takes_at_most_the_capacity(clock):
+    bucket = TokenBucket(60)
+
+    assert bucket.reserve(1000) == 0  # bigger than a minute's worth, let it by
+    assert bucket.reserve(1) == pytest.approx(1)
+
+
+def test_refill_is_capped(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(60)
+
+    clock[0] += 30
+    assert bucket.reserve(0) == 0
+    assert bucket.available == pytest.approx(30)
+
+    clock[0] += 3600
+    bucket.reserve(0)
+    assert bucket.available == 60
+
+
+def test_consume_charges_after_the_fact(clock):
+    bucket = TokenBucket(60)
+    bucket.consume(90)
+
+    assert bucket.available == -30
+    assert bucket.reserve(0) == pytest.approx(30)
+
+
+def test_limiter_waits_for_the_tighter_budget(clock):
+    limiter = RateLimiter(tpm=600, rpm=1)
+
+    assert limiter._reserve(100) == 0
+    assert limiter._reserve(100) == pytest.approx(60)  # requests ran out
+
+
+def test_unlimited_limiter(clock):
+    limiter = RateLimiter(tpm=None, rpm=None)
+
+    assert limiter._reserve(10**9) == 0
+    limiter.consume(10**9)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+from gpyt.router import MESSAGE_OVERHEAD, Router, Rule, load_rules
+
+BACKENDS = {"gpt": "gpt-3.5-turbo", "gpt4": "gpt-4"}  # 4096 and 8096 tokens
+
+
+@pytest.fixture
+def router(fake_tokenizer) -> Router:
+    return Router(BACKENDS, tokenizer=fake_tokenizer)
+
+
+async def _deltas(*deltas: str, delay: float = 0):
+    for delta in deltas:
+        await asyncio.sleep(delay)
+        yield delta
+
+
+def test_estimate_counts_every_message(router):
+    assert router.estimate(["four", "six..."]) == 4 + 6 + 2 * MESSAGE_OVERHEAD
+
+
+def test_fits_leaves_room_for_the_reply(router):
+    assert router.fits("gpt", 3072)
+    assert not router.fits("gpt", 3073)
+    assert router.fits("gpt4", 3073)
+
+
+def test_cheapest_backend_by_default(router):
+    assert router.route(100, "hi") == "gpt"
+
+
+def test_requests_too_long_for_the_cheap_model_go_to_the_big_one(router):
+    assert router.route(5000, "hi") == "gpt4"
+
+
+def test_when_nothing_fits_the_largest_context_wins(router):
+    assert router.route(100_000, "hi") == "gpt4"
+
+
+def test_slow_backends_are_passed_over(router):
+    router.observe("gpt", router.max_ttft + 1)
+
+    assert router.route(100, "hi") == "gpt4"
+
+
+def test_quickest_backend_when_all_are_slow(router):
+    router.observe("gpt", router.max_ttft + 3)
+    router.observe("gpt4", router.max_ttft + 1)
+
+    assert router.route(100, "hi") == "gpt4"
+
+
+def test_latency_is_the_recent_median(router):
+    assert router.latency("gpt") is None
+
+    for ttft in (1, 9, 2):
+        router.observe("gpt", ttft)
+    router.observe("unknown", 1)  # ignored
+
+    assert router.latency("gpt") == 2
+
+
+def test_first_matching_rule_wins(fake_tokenizer):
+    router = Router(
+        BACKENDS,
+        [
+            Rule(backend="gpt4", keywords=["Proof"]),
+            Rule(backend="gpt4", min_tokens=2000),
+            Rule(backend="gpt", max_tokens=10),
+        ],
+        tokenizer=fake_tokenizer,
+    )
+
+    assert router.route(100, "write a proof") == "gpt4"
+    assert router.route(2000, "hi") == "gpt4"
+    assert router.route(5, "hi") == "gpt"
+    assert router.route(5000, "short proof") == "gpt4"
+
+
+def test_rules_are_skipped_when_their_backend_does_not_fit(fake_tokenizer):
+    router = Router(BACKENDS, [Rule(backend="gpt")], tokenizer=fake_tokenizer)
+
+    assert router.route(5000, "hi") == "gpt4"
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"backend": "gpt4", "keywords": ["refactor"]}]))
+
+    assert load_rules(path) == [Rule(backend="gpt4", keywords=["refactor"])]
+
+
+def test_timed_observes_the_first_token(router):
+    async def collect() -> list[str]:
+        return [delta async for delta in router.timed("gpt", _deltas("a", "b"))]
+
+    assert asyncio.run(collect()) == ["a", "b"]
+    assert len(router._ttft["gpt"]) == 1
+
+
+def test_timed_observes_a_stream_given_up_on(router):
+    async def give_up() -> None:
+        async def consume() -> None:
+            async for _ in router.timed("gpt", _deltas("a", delay=10)):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(give_up())
+    assert router.latency("gpt") >= 0.01
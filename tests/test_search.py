@@ -0,0 +1,65 @@
+import threading
+
+from gpyt.conversation import Conversation, Message
+from gpyt.search import SearchIndex
+
+
+def _conversation(id: str, *contents: str) -> Conversation:
+    return Conversation(
+        id=id,
+        summary=id,
+        log=[
+            Message(id=f"{id}-{i}", role="user", content=content)
+            for i, content in enumerate(contents)
+        ],
+    )
+
+
+def _hits(index: SearchIndex, query: str) -> list[str]:
+    return sorted(hit.message_id for hit in index.search(query, limit=100))
+
+
+def test_search(tmp_path):
+    index = SearchIndex(tmp_path)
+    index.add("a", _conversation("a", "ignored").log)  # not built yet
+    index.build([_conversation("a", "red apples"), _conversation("b", "green pears")])
+    index.add("b", [Message(id="b-1", role="assistant", content="red pears")])
+
+    assert index.is_built
+    assert _hits(index, "red") == ["a-0", "b-1"]
+    assert _hits(index, "pe") == ["b-0", "b-1"]  # the last word is a prefix
+    assert _hits(index, "ignored") == []
+    assert index.search("!?") == []
+
+
+def test_saves_during_a_build_are_queued(tmp_path):
+    index = SearchIndex(tmp_path)
+    reading = threading.Event()
+    resume = threading.Event()
+    on_disk = _conversation("a", "red apples")
+
+    def conversations():
+        yield _conversation("b", "green pears")
+        reading.set()
+        resume.wait()
+        yield on_disk  # read after the save below, so it holds the new message
+
+    build = threading.Thread(target=index.build, args=(conversations(),))
+    build.start()
+    reading.wait()
+
+    saved = Message(id="a-1", role="assistant", content="red cherries")
+    on_disk.log.append(saved)
+
+    def save() -> None:
+        index.add("a", [saved])
+        index.add("c", _conversation("c", "red grapes").log)
+
+    saving = threading.Thread(target=save, daemon=True)
+    saving.start()
+    saving.join(timeout=1)
+    resume.set()
+    assert not saving.is_alive()  # didn't wait for the build
+    build.join()
+
+    assert _hits(index, "red") == ["a-0", "a-1", "c-0"]  # each exactly once
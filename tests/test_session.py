@@ -0,0 +1,54 @@
+import asyncio
+
+from benchmarks.mock_openai import MockServer, MockSettings
+from gpyt.assistant import Assistant
+
+
+def _assistant(server: MockServer) -> Assistant:
+    return Assistant(
+        api_key="sk-test",
+        model="gpt-3.5-turbo",
+        prompt="Be brief.",
+        api_base=server.api_base,
+    )
+
+
+async def _wait_for(condition, timeout: float = 2.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_cancelled_stream_closes_its_connection():
+    async def run(server: MockServer) -> None:
+        assistant = _assistant(server)
+        stream = assistant.astream("hi")
+        for _ in range(3):
+            await anext(stream)
+        await stream.aclose()  # what cancelling, or losing a hedge, does
+
+        await _wait_for(lambda: server.stats["disconnects"])
+        await assistant.aclose()
+
+    settings = MockSettings(chunks=500, chunk_delay=0.005)
+    with MockServer(settings) as server:
+        asyncio.run(run(server))
+
+    assert server.stats["disconnects"] == 1
+    assert server.stats["deltas"] < 100
+
+
+def test_finished_streams_share_a_connection():
+    async def run(server: MockServer) -> list[str]:
+        assistant = _assistant(server)
+        answers = ["".join([d async for d in assistant.astream(q)]) for q in "ab"]
+        await assistant.aclose()
+        return answers
+
+    with MockServer(MockSettings(chunks=10)) as server:
+        answers = asyncio.run(run(server))
+
+    assert answers[0] == answers[1] != ""
+    assert server.stats["connections"] == 1
+    assert server.stats["disconnects"] == 0
@@ -0,0 +1,119 @@
+import json
+import os
+
+from gpyt.conversation import Conversation, Message
+from gpyt.id import get_id
+from gpyt.store import ConversationStore
+
+
+def _conversation(*contents: str) -> Conversation:
+    return Conversation(
+        id=get_id(),
+        summary="Greetings",
+        log=[_message(content) for content in contents],
+    )
+
+
+def _message(content: str) -> Message:
+    return Message(id=get_id(), role="user", content=content)
+
+
+def _lines(path) -> list[str]:
+    with open(path) as fd:
+        return fd.readlines()
+
+
+def test_save_appends_only_new_records(tmp_path):
+    store = ConversationStore(tmp_path)
+    conversation = _conversation("hi", "hello")
+    path = store.save(conversation)
+    assert len(_lines(path)) == 4  # header, 2 messages, commit
+
+    conversation.log.append(_message("bye"))
+    conversation.summary = "Farewells"
+    store.save(conversation)
+    store.save(conversation)  # nothing new
+
+    lines = _lines(path)
+    assert len(lines) == 4 + 3  # summary, message, commit
+    assert json.loads(lines[-1]) == {"type": "commit", "records": 2}
+
+    loaded = ConversationStore(tmp_path).load(path)
+    assert loaded == conversation
+
+
+def test_torn_save_is_dropped_and_the_next_one_kept(tmp_path):
+    store = ConversationStore(tmp_path)
+    conversation = _conversation("hi")
+    path = store.save(conversation)
+    with open(path, "a") as fd:  # a crash halfway through the next save
+        fd.write(json.dumps({"type": "message", **_message("lost").dict()}) + "\n")
+        fd.write('{"type": "mess')
+
+    reopened = ConversationStore(tmp_path)
+    loaded = reopened.load(path)
+    assert [m.content for m in loaded.log] == ["hi"]
+
+    loaded.log.append(_message("again"))
+    reopened.save(loaded)
+
+    assert [m.content for m in ConversationStore(tmp_path).load(path).log] == [
+        "hi",
+        "again",
+    ]
+
+
+def test_files_without_commits_are_read_whole(tmp_path):
+    store = ConversationStore(tmp_path)
+    conversation = _conversation("hi", "hello")
+    path = store.path_for(conversation.id)
+    os.makedirs(path.parent)
+    with open(path, "w") as fd:
+        header = {"type": "conversation", "id": conversation.id, "summary": "Hi"}
+        fd.write(json.dumps(header) + "\n")
+        for message in conversation.log:
+            fd.write(json.dumps({"type": "message", **message.dict()}) + "\n")
+
+    loaded = store.load(path)
+    assert loaded == Conversation(
+        id=conversation.id, summary="Hi", log=conversation.log
+    )
+
+    loaded.log.append(_message("bye"))
+    store.save(loaded)
+    assert len(ConversationStore(tmp_path).load(path).log) == 3
+
+
+def test_unknown_message_keys_are_ignored(tmp_path):
+    store = ConversationStore(tmp_path)
+    conversation = _conversation("hi")
+    path = store.save(conversation)
+    record = {"type": "message", **_message("hello").dict(), "model": "gpt-5"}
+    with open(path, "a") as fd:
+        fd.write(json.dumps(record) + "\n")
+        fd.write(json.dumps({"type": "commit", "records": 1}) + "\n")
+
+    assert [m.content for m in store.load(path).log] == ["hi", "hello"]
+
+
+def test_migrate_legacy(tmp_path):
+    legacy_id = "0123456789abcdef"  # ids used to be 16 hex digits, untimed
+    legacy_path = tmp_path / f"convo-{legacy_id}.json"
+    log = [_message("hi"), _message("hello")]
+    with open(legacy_path, "w") as fd:
+        json.dump(
+            {"id": legacy_id, "summary": "Old", "log": [m.dict() for m in log]}, fd
+        )
+    os.utime(legacy_path, (1_000_000, 1_000_000))
+
+    store = ConversationStore(tmp_path)
+    assert store.migrate_legacy() == 1
+    assert store.migrate_legacy() == 0
+
+    assert not legacy_path.exists()
+    path = store.path_for(legacy_id)
+    assert path.parent == tmp_path  # stays flat
+    assert os.stat(path).st_mtime == 1_000_000
+    assert store.load(path) == Conversation(id=legacy_id, summary="Old", log=log)
+    [entry] = store.entries()
+    assert (entry.id, entry.mtime, entry.messages) == (legacy_id, 1_000_000, 2)
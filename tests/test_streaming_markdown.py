@@ -0,0 +1,39 @@
+from gpyt.components.streaming_markdown import find_block_boundary
+
+
+def test_paragraphs():
+    text = "one\n\ntwo\n\nthree\n"
+
+    assert find_block_boundary(text) == text.index("three")
+
+
+def test_unfinished_line_is_still_open():
+    assert find_block_boundary("one\n\ntwo") == 0
+    assert find_block_boundary("one\n\ntwo\n") == 5
+
+
+def test_blank_lines_inside_a_fence_are_code():
+    assert find_block_boundary("```\ncode\n\nmore\n```\n") == 0
+    assert find_block_boundary("~~~\ncode\n\nmore\n") == 0
+
+
+def test_fences_start_blocks():
+    text = "text\n\n```py\nx = 1\n```\n\nnext\n"
+
+    assert find_block_boundary(text[: text.index("x = 1")]) == text.index("```")
+    assert find_block_boundary(text) == text.index("next")
+
+
+def test_list_items_and_indents_may_continue_a_block():
+    assert find_block_boundary("- a\n\n- b\n") == 0
+    assert find_block_boundary("1. a\n\n2) b\n") == 0
+    assert find_block_boundary("p\n\n    code\n") == 0
+
+
+def test_start():
+    text = "one\n\ntwo\n\nthree\n"
+    start = text.index("two")
+
+    assert find_block_boundary(text, start) == text.index("three")
+    assert find_block_boundary(text, len(text)) == len(text)
+    assert find_block_boundary("one\n\ntwo\n", start=5) == 5
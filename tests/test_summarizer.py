@@ -0,0 +1,60 @@
+import pytest
+
+from gpyt.summarizer import (
+    LLM,
+    LOCAL,
+    AssistantSummarizer,
+    KeywordSummarizer,
+    make_summarizer,
+)
+
+
+@pytest.mark.parametrize(
+    "text, title",
+    [
+        ("How do I reverse a linked list in Python?", "Reverse Linked List Python"),
+        ("What is C++ template metaprogramming?", "C++ Template Metaprogramming"),
+        (
+            "Can you explain the TCP handshake and why SYN cookies matter?",
+            "TCP Handshake SYN Cookies Matter",
+        ),
+    ],
+)
+def test_titles_are_the_key_phrases(text, title):
+    assert KeywordSummarizer().summarize(text) == title
+
+
+def test_words_with_case_keep_it():
+    title = KeywordSummarizer().summarize("iPhone battery tips for macOS users")
+
+    assert title == "iPhone Battery Tips macOS Users"
+
+
+def test_titles_are_capped_at_max_words():
+    summarizer = KeywordSummarizer(max_words=2)
+
+    assert summarizer.summarize("reverse linked list quickly") == "Reverse Linked"
+
+
+def test_only_the_start_of_the_message_is_read():
+    summarizer = KeywordSummarizer(max_chars=10)
+
+    assert summarizer.summarize("sort dicts " + "by value " * 1000) == "Sort Dicts"
+
+
+@pytest.mark.parametrize("text", ["", "hi", "??", "thanks, can you help?"])
+def test_nothing_to_title_falls_back(text):
+    assert KeywordSummarizer().summarize(text) == KeywordSummarizer.FALLBACK
+
+
+def test_make_summarizer():
+    class Titler:
+        def get_conversation_summary(self, text: str) -> str:
+            return f"About {text}"
+
+    local = make_summarizer(LOCAL, Titler)
+    llm = make_summarizer(LLM, Titler)
+
+    assert isinstance(local, KeywordSummarizer) and not local.blocking
+    assert isinstance(llm, AssistantSummarizer) and llm.blocking
+    assert llm.summarize("tcp") == "About tcp"